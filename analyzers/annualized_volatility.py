@@ -19,6 +19,8 @@ class AnnualizedVolatility(Analyzer):
       - use_log (default False) : 是否将每周期收益转换为对数收益 ln(1+r)
       - stddev_sample (default False) : 是否使用样本标准差（Bessel 修正）
       - fund (default None) : 同 TimeReturn 的 fund 参数
+      - streaming (default False) : 流式模式，每个周期结束时用 Welford 算法更新均值/方差，
+        不保存收益率序列（O(1) 内存），运行中可随时调用 current_annual_vol()
     """
 
     params = (
@@ -28,6 +30,7 @@ class AnnualizedVolatility(Analyzer):
         ("use_log", False),
         ("stddev_sample", False),
         ("fund", None),
+        ("streaming", False),
     )
 
     RATEFACTORS = {
@@ -38,16 +41,49 @@ class AnnualizedVolatility(Analyzer):
     }
 
     def __init__(self):
-        # 使用 TimeReturn 来获取每个 timeframe 的 returns
-        self.timereturn = TimeReturn(
-            timeframe=self.p.timeframe, compression=self.p.compression, fund=self.p.fund
-        )
+        if self.p.streaming:
+            # 只保留当前周期收益率，周期结束时写入 moments
+            self.moments = RunningMoments(use_log=self.p.use_log)
+            self.timereturn = PeriodReturn(
+                moments=self.moments,
+                timeframe=self.p.timeframe,
+                compression=self.p.compression,
+                fund=self.p.fund,
+            )
+        else:
+            # 使用 TimeReturn 来获取每个 timeframe 的 returns
+            self.timereturn = TimeReturn(
+                timeframe=self.p.timeframe,
+                compression=self.p.compression,
+                fund=self.p.fund,
+            )
         self.annual_vol = None
         self.std_period = None
         self.n_periods = 0
         self.factor = None
 
+    def get_factor(self):
+        # 决定 factor（周期到年的换算因子）
+        if self.p.factor is not None:
+            return self.p.factor
+        return self.RATEFACTORS.get(self.p.timeframe)
+
+    def current_annual_vol(self):
+        """流式模式下返回截至当前 bar 的年化波动率（包含尚未结束的当前周期）"""
+        factor = self.get_factor()
+        if factor is None:
+            return None
+        moments = self.moments.with_value(self.timereturn.current)
+        std_p = moments.std(bessel=self.p.stddev_sample)
+        if std_p is None:
+            return None
+        return float(std_p * math.sqrt(float(factor)))
+
     def stop(self):
+        if self.p.streaming:
+            self._stop_streaming()
+            return
+
         # 取得所有周期性收益（字典 -> list）
         returns = list(itervalues(self.timereturn.get_analysis()))
         # returns 是按 period 排序的 simple returns (如 0.01, -0.02 ...)
@@ -68,13 +104,7 @@ class AnnualizedVolatility(Analyzer):
                 # 若某些 r <= -1 导致 log 错误，回退为原始 returns 并记录
                 rets = returns
 
-        # 决定 factor（周期到年的换算因子）
-        factor = None
-        if self.p.factor is not None:
-            factor = self.p.factor
-        elif self.p.timeframe in self.RATEFACTORS:
-            factor = self.RATEFACTORS[self.p.timeframe]
-
+        factor = self.get_factor()
         self.factor = factor
 
         # 标准差（按用户是否要求样本修正）
@@ -87,8 +117,27 @@ class AnnualizedVolatility(Analyzer):
         except Exception:
             std_p = float(np.std(rets, ddof=1 if self.p.stddev_sample else 0))
 
+        self._set_result(std_p, len(rets), factor)
+
+    def _stop_streaming(self):
+        # 最后一个周期在 stop 时才结束，与 TimeReturn 的结果保持一致
+        moments = self.moments.with_value(self.timereturn.current)
+        if moments.n == 0:
+            self.annual_vol = None
+            self.std_period = None
+            self.n_periods = 0
+            self.rets = {"annual_vol": None}
+            return
+
+        self.factor = self.get_factor()
+        std_p = moments.std(bessel=self.p.stddev_sample)
+        self._set_result(
+            float("nan") if std_p is None else std_p, moments.n, self.factor
+        )
+
+    def _set_result(self, std_p, n_periods, factor):
         self.std_period = float(std_p)
-        self.n_periods = len(rets)
+        self.n_periods = n_periods
 
         # 年化：std_period * sqrt(factor) （如果不知道 factor，则不年化，返回周期 std）
         if factor is not None:
@@ -113,3 +162,79 @@ class AnnualizedVolatility(Analyzer):
 
     def get_analysis(self):
         return self.rets
+
+
+class RunningMoments(object):
+    """
+    Welford 算法维护收益率的个数/均值/平方差和
+
+    use_log 时同时维护原始收益率和对数收益率两组统计量：
+    一旦出现 r <= -1 无法取对数，与非流式实现一样整体回退为原始收益率
+    """
+
+    def __init__(self, use_log=False):
+        self.use_log = use_log
+        self.log_failed = False
+        self.raw = [0, 0.0, 0.0]
+        self.log = [0, 0.0, 0.0]
+
+    @staticmethod
+    def _update(acc, x):
+        acc[0] += 1
+        delta = x - acc[1]
+        acc[1] += delta / acc[0]
+        acc[2] += delta * (x - acc[1])
+
+    def add(self, r):
+        self._update(self.raw, r)
+        if self.use_log and not self.log_failed:
+            if r <= -1.0:
+                self.log_failed = True
+            else:
+                self._update(self.log, math.log(1.0 + r))
+
+    def with_value(self, r):
+        """返回加入 r 之后的副本（r 为 None 时原样复制），不修改自身"""
+        moments = RunningMoments(self.use_log)
+        moments.log_failed = self.log_failed
+        moments.raw = list(self.raw)
+        moments.log = list(self.log)
+        if r is not None:
+            moments.add(r)
+        return moments
+
+    @property
+    def n(self):
+        return self.raw[0]
+
+    def std(self, bessel=False):
+        acc = self.log if self.use_log and not self.log_failed else self.raw
+        n, _, m2 = acc
+        if n - bessel <= 0:
+            return None
+        return math.sqrt(max(m2, 0.0) / (n - bessel))
+
+
+class PeriodReturn(TimeReturn):
+    """
+    不保存历史的 TimeReturn：只记录当前周期的收益率，周期结束时把它加入 moments
+    """
+
+    params = (("moments", None),)
+
+    def start(self):
+        super(PeriodReturn, self).start()
+        self.current = None
+
+    def on_dt_over(self):
+        if self.current is not None:
+            self.p.moments.add(self.current)
+            self.current = None
+        super(PeriodReturn, self).on_dt_over()
+
+    def next(self):
+        self.current = (self._value / self._value_start) - 1.0
+        self._lastvalue = self._value
+
+    def get_analysis(self):
+        return {}
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import time
+
+import numpy as np
+
+from backtrader import Analyzer
+
+
+class Latency(Analyzer):
+    """
+    逐 bar 记录从 feed 取到 K 线到策略 next 结束的耗时
+
+    需要 feed 在 _load 时记录 pushed_at（time.perf_counter()），如 LiveData。
+    只保留最近 window 根 K 线的耗时用于计算分位数，内存不随运行时间增长。
+
+    get_analysis() 返回 bars、mean、p50、p99、max，耗时单位为微秒
+    """
+
+    params = (("window", 100_000),)
+
+    def start(self):
+        self.samples = np.zeros(self.p.window)
+        self.bars = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def next(self):
+        latency = time.perf_counter() - self.data.pushed_at
+        self.samples[self.bars % self.p.window] = latency
+        self.bars += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    def get_analysis(self):
+        samples = self.samples[: min(self.bars, self.p.window)]
+        if not len(samples):
+            return {"bars": 0}
+        p50, p99 = np.percentile(samples, [50, 99]).tolist()
+        return {
+            "bars": self.bars,
+            "mean": 1e6 * self.total / self.bars,
+            "p50": 1e6 * p50,
+            "p99": 1e6 * p99,
+            "max": 1e6 * self.max,
+        }
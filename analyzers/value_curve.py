@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import array
+
+import numpy as np
+
+from backtrader import Analyzer, Order
+
+
+class ValueCurve(Analyzer):
+    """
+    逐 bar 记录收盘后的账户价值和成交记录
+
+    get_analysis() 返回账户价值数组；datetimes() 为对应的 backtrader 日期数值，
+    fills() 为 (日期数值, 成交价, 数量, data 序号) 的成交列表，数量为负表示卖出
+    """
+
+    def start(self):
+        self.values = array.array("d")
+        self.dtnums = array.array("d")
+        self._fills = []
+
+    def notify_order(self, order):
+        if order.status != Order.Completed:
+            return
+        self._fills.append(
+            (
+                order.data.datetime[0],
+                order.executed.price,
+                order.executed.size,
+                self.strategy.datas.index(order.data),
+            )
+        )
+
+    def next(self):
+        self.values.append(self.strategy.broker.getvalue())
+        self.dtnums.append(self.strategy.datetime[0])
+
+    def get_analysis(self):
+        return np.array(self.values)
+
+    def datetimes(self):
+        return np.array(self.dtnums)
+
+    def fills(self):
+        return list(self._fills)
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import _atomic_write
+
+# 定长记录: 毫秒时间戳 + OHLCV，小端序，每根 K 线 48 字节
+BAR_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+BAR_SUFFIX = ".npy"
+
+
+def bar_file(root, symbol, interval):
+    return os.path.join(root, f"{symbol.replace('/', '_')}_{interval}{BAR_SUFFIX}")
+
+
+def is_bar_file(path):
+    return os.path.isfile(path) and path.endswith(BAR_SUFFIX)
+
+
+def write_bars(data, path):
+    """
+    把 download() 返回的 DataFrame 写成定长记录的 K 线文件（.npy 格式，头部记录 dtype 和行数）
+
+    先写临时文件再替换，正在读取旧文件的进程不受影响
+    """
+    bars = np.empty(len(data), dtype=BAR_DTYPE)
+    bars["timestamp"] = data.index.as_unit("ms").asi8
+    for name in BAR_DTYPE.names[1:]:
+        bars[name] = data[name].to_numpy(dtype=np.float64)
+    bars = bars[np.argsort(bars["timestamp"], kind="stable")]
+
+    _atomic_write(path, "wb", lambda f: np.save(f, bars))
+    return path
+
+
+def open_bars(path):
+    """只读映射 K 线文件，多个进程打开同一文件时共享操作系统的页缓存"""
+    bars = np.load(path, mmap_mode="r")
+    if bars.dtype != BAR_DTYPE:
+        raise ValueError(f"{path} is not a bar file: dtype {bars.dtype}")
+    return bars
+
+
+def slice_bars(bars, start_date=None, end_date=None):
+    """按时间截取 [start_date, end_date]，返回的仍是映射上的视图，不拷贝数据"""
+    timestamps = bars["timestamp"]
+    lo, hi = 0, len(bars)
+    if start_date is not None:
+        start = _timestamp_ms(start_date)
+        lo = int(np.searchsorted(timestamps, start, side="left"))
+    if end_date is not None:
+        end = _timestamp_ms(end_date)
+        hi = int(np.searchsorted(timestamps, end, side="right"))
+    return bars[lo:hi]
+
+
+def bar_arrays(bars):
+    """(timestamps, {column: array})，可直接作为 ArrayData 的 dataname，各列均为映射上的视图"""
+    return bars["timestamp"], {name: bars[name] for name in BAR_DTYPE.names[1:]}
+
+
+def bars_frame(bars, symbol=None):
+    """转为与 download() 相同结构的 DataFrame（会拷贝数据）"""
+    data = pd.DataFrame({name: np.array(bars[name]) for name in BAR_DTYPE.names[1:]})
+    data.index = pd.to_datetime(
+        np.array(bars["timestamp"]), unit="ms", utc=True
+    ).rename("datetime")
+    if symbol is not None:
+        data["symbol"] = symbol
+    return data
+
+
+def _timestamp_ms(date):
+    date = pd.Timestamp(date)
+    if date.tzinfo is None:
+        date = date.tz_localize("UTC")
+    return date.value // 10**6
@@ -0,0 +1,278 @@
+import io
+import os
+import sys
+import json
+import time
+import datetime
+import platform
+import resource
+import importlib
+import contextlib
+import subprocess
+import multiprocessing as mp
+
+import click
+import numpy as np
+
+from cli import COMMANDS
+from profiling import PhaseTimer
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# 名称: (策略, 参数)
+CASES = {
+    "reversal": ("reversal:ReveralStrategy", {}),
+    "renko": ("renko:RenkoStrategy", {}),
+    "buyhold": ("buyhold:BuyHoldStrategy", {}),
+    "voltarget": ("voltarget:VolTarget", {}),
+    "periodic_dca": ("dca.periodic_dca:DCAStrategy", {"investment_interval": "1w"}),
+    "rsi_dca": ("dca.rsi_dca:DCAStrategy", {}),
+    "rsi_tp_dca": ("dca.rsi_tp_dca:DCAStrategy", {}),
+    "bbands_dca": ("dca.bbands_dca:DCAStrategy", {}),
+    "ema_dca": ("dca.ema_dca:DCAStrategy", {}),
+    "momentum": ("momentum:MomentumStrategy", {}),
+}
+
+# python cli.py 的启动耗时预算（秒），按参数前缀匹配；子命令 --help 只导入 commands 中的命令模块
+STARTUP_BUDGETS = {"--help": 0.3, "": 0.5}
+# 只显示 --help 时不应导入的模块（只在运行回测、下载、画图时导入）
+LAZY_MODULES = ("backtrader", "pandas", "ccxt", "matplotlib", "yfinance")
+
+# momentum 是横截面策略，按标的个数分档，每个标的 MOMENTUM_BARS 根 K 线
+MOMENTUM_SIZES = {"10x1k": 10, "300x1k": 300}
+MOMENTUM_BARS = 1_000
+
+
+def synthetic_bars(n, interval="1h", seed=0, start="2020-01-01", symbol="SYN/USDT"):
+    """
+    确定性的合成 K 线（几何随机游走），结构与 download() 返回的 DataFrame 相同，不访问网络
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    open_ = np.concatenate([[100.0], close[:-1]]) * (1 + rng.normal(0.0, 0.002, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0.0, 0.003, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0.0, 0.003, n)))
+    volume = rng.uniform(1.0, 10.0, n)
+
+    index = pd.date_range(
+        start, periods=n, freq=pd.Timedelta(interval), tz="UTC", name="datetime"
+    )
+    data = pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+    data["symbol"] = symbol
+    return data
+
+
+def case_sizes(case):
+    if case == "momentum":
+        return list(MOMENTUM_SIZES)
+    return list(SIZES)
+
+
+def run_case(case, size):
+    """在当前进程中跑一个用例，返回结果字典"""
+    # 用例名等常量供 cli.py benchmark --help 使用，backtrader 只在运行用例时导入
+    import backtrader as bt
+
+    from panel import panel_from_frames
+    from feeds.arrayfeed import ArrayData
+    from feeds.panelfeed import add_panel
+    from analyzers.annualized_volatility import AnnualizedVolatility
+
+    path, params = CASES[case]
+    module_name, class_name = path.split(":")
+    strategy = getattr(importlib.import_module(module_name), class_name)
+
+    if case == "momentum":
+        count, bars = MOMENTUM_SIZES[size], MOMENTUM_BARS
+        frames = [
+            synthetic_bars(bars, interval="1d", seed=i, symbol=f"SYN{i}/USDT")
+            for i in range(count)
+        ]
+    else:
+        count, bars = 1, SIZES[size]
+        frames = [synthetic_bars(bars)]
+
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1e8)
+    cerebro.broker.setcommission(0.0005)
+    if case == "momentum":
+        # 横截面策略用对齐后的 Panel，与 momentum.py 一致
+        panel = panel_from_frames({df["symbol"].iloc[0]: df for df in frames})
+        feeds = add_panel(cerebro, panel, plot=False)
+    else:
+        feeds = [
+            ArrayData(dataname=frames[0], name=frames[0]["symbol"].iloc[0], plot=False)
+        ]
+        cerebro.adddata(feeds[0])
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe")
+    cerebro.addanalyzer(AnnualizedVolatility, _name="annual_vol")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with PhaseTimer() as timer:
+        for feed in feeds:
+            timer.wrap(feed, "preload", "preload")
+        # 每根 bar 调用一次，依次驱动各 analyzer 的 next
+        timer.wrap(bt.Strategy, "_next_analyzers", "analyzers")
+        # 策略在 stop() 中打印的结果不输出
+        with contextlib.redirect_stdout(io.StringIO()), timer.phase("run"):
+            cerebro.run()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    wall = sum(timer.times.values())
+    return {
+        "case": case,
+        "size": size,
+        "symbols": count,
+        "bars": count * bars,
+        "seconds": wall,
+        "bars_per_sec": count * bars / wall,
+        "preload": timer.times["preload"],
+        "run": timer.times["run"],
+        "analyzers": timer.times["analyzers"],
+        # ru_maxrss 在 Linux 上单位为 KB
+        "peak_rss_mb": rss_after / 1024,
+        "rss_before_mb": rss_before / 1024,
+    }
+
+
+def _run_isolated(case, size):
+    try:
+        return run_case(case, size)
+    except Exception as e:
+        return {"case": case, "size": size, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_suite(cases, sizes=None):
+    """每个用例在新的 spawn 进程中运行，峰值内存互不影响；用例依次运行，避免相互争用 CPU"""
+    ctx = mp.get_context("spawn")
+    for case in cases:
+        for size in case_sizes(case):
+            if sizes and size not in sizes:
+                continue
+            with ctx.Pool(1) as pool:
+                yield pool.apply(_run_isolated, (case, size))
+
+
+def startup_time(args, repeat=5):
+    """
+    在新进程中运行 python cli.py args，返回 (最短耗时秒数, 导入了的 LAZY_MODULES)
+
+    导入的模块用 python -X importtime 的输出判断
+    """
+    cmd = [sys.executable, os.path.join(os.path.dirname(__file__), "cli.py"), *args]
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        seconds.append(time.perf_counter() - start)
+
+    out = subprocess.run(
+        [cmd[0], "-X", "importtime", *cmd[1:]], capture_output=True, text=True
+    )
+    modules = {
+        line.rsplit("|", 1)[-1].strip().split(".")[0]
+        for line in out.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    return min(seconds), sorted(modules.intersection(LAZY_MODULES))
+
+
+def startup_budget(args):
+    for prefix, budget in STARTUP_BUDGETS.items():
+        if " ".join(args).startswith(prefix):
+            return budget
+
+
+def check_startup():
+    """cli.py --help 及各子命令 --help 的启动耗时，超出预算或导入了 LAZY_MODULES 时返回 False"""
+    ok = True
+    for args in [["--help"]] + [[name, "--help"] for name in COMMANDS]:
+        seconds, modules = startup_time(args)
+        budget = startup_budget(args)
+        failed = seconds > budget or modules
+        ok = ok and not failed
+        click.echo(
+            f"{' '.join(args):<24}{seconds:>7.3f}s  预算 {budget:.1f}s"
+            + (f"  导入了 {', '.join(modules)}" if modules else "")
+            + ("  超出" if failed else "")
+        )
+    return ok
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import pandas as pd
+    import backtrader as bt
+
+    return {
+        "commit": git_commit(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "backtrader": bt.__version__,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def format_result(result, baseline=None):
+    name = f"{result['case']:<14}{result['size']:>8}"
+    if "error" in result:
+        return f"{name}  {result['error']}"
+    line = (
+        f"{name}  {result['bars_per_sec']:>12,.0f} bars/s  "
+        f"{result['seconds']:>8.2f}s  "
+        f"preload {result['preload']:>6.2f}s  "
+        f"run {result['run']:>7.2f}s  "
+        f"analyzers {result['analyzers']:>6.2f}s  "
+        f"rss {result['peak_rss_mb']:>7.1f}MB"
+    )
+    if baseline and "bars_per_sec" in baseline:
+        line += f"  x{result['bars_per_sec'] / baseline['bars_per_sec']:.2f}"
+    return line
+
+
+def run(cases, sizes, output, compare, startup):
+    if startup:
+        raise SystemExit(0 if check_startup() else 1)
+
+    baseline = {}
+    if compare:
+        with open(compare) as f:
+            for result in json.load(f)["results"]:
+                baseline[(result["case"], result["size"])] = result
+
+    results = []
+    for result in run_suite(cases or list(CASES), sizes):
+        results.append(result)
+        click.echo(
+            format_result(result, baseline.get((result["case"], result["size"])))
+        )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({**environment(), "results": results}, f, indent=2)
+        click.echo(f"结果已保存到: {output}")
+
+
+if __name__ == "__main__":
+    from commands.benchmark import main
+
+    main()
@@ -1,6 +1,12 @@
+import click
+import numpy as np
 import backtrader as bt
 
 from data import download
+from feeds.arrayfeed import ArrayData
+from profiling import Profiler
+from report import render_report
+from analyzers.value_curve import ValueCurve
 
 
 class BuyHoldStrategy(bt.Strategy):
@@ -17,15 +23,27 @@ class BuyHoldStrategy(bt.Strategy):
             self.order_target_size(target=target_size)
 
 
-def main():
+def vector_targets(df):
+    """BuyHoldStrategy 的目标仓位比例，供 engine.backtest 使用"""
+    targets = np.full(len(df), np.nan)
+    targets[0] = 1.0
+    return targets
+
+
+def run(report, plot, profile, cprofile, profile_output):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     cerebro = bt.Cerebro(stdstats=False)
     cerebro.broker.setcash(1e8)
     cerebro.broker.setcommission(0.001, leverage=2.0)
 
-    df = download(
-        symbol="BTC/USDT", start_date="2020-01-01", end_date="2025-11-30", interval="1d"
-    )
-    data = bt.feeds.PandasData(dataname=df)
+    with profiler.phase("download"):
+        df = download(
+            symbol="BTC/USDT",
+            start_date="2020-01-01",
+            end_date="2025-11-30",
+            interval="1d",
+        )
+    data = ArrayData(dataname=df)
     data.plotinfo.plot = False
     cerebro.adddata(data)
 
@@ -36,9 +54,18 @@ def main():
 
     cerebro.addstrategy(BuyHoldStrategy)
 
-    cerebro.run()
-    cerebro.plot()
+    cerebro.addanalyzer(ValueCurve, _name="value")
+
+    strats = profiler.run(cerebro)
+    with profiler.phase("plot"):
+        render_report(strats[0], report)
+        click.echo(f"报告已保存到: {report}")
+        if plot:
+            cerebro.plot()
+    profiler.finish(profile_output)
 
 
 if __name__ == "__main__":
+    from commands.buyhold import main
+
     main()
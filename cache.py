@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import hashlib
+import zipfile
+import threading
+import contextlib
+
+import numpy as np
+
+
+def _atomic_write(path, mode, writer):
+    """
+    调用 writer(f) 写入 path：先写临时文件再替换，避免中断时留下损坏的文件，
+    并发写入同一个文件的进程、线程（如 download_many）各自写自己的临时文件，
+    读取方只会看到完整的文件
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            writer(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+# np.load 读取不存在、截断或损坏的 npz 时可能抛出的异常
+_LOAD_ERRORS = (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile)
+
+CACHE_DIR = os.getenv(
+    "OHLCV_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ohlcv")
+)
+
+
+class OHLCVCache:
+    """
+    本地 K 线缓存，按 (exchange, symbol, interval) 的哈希存放已下载的 K 线
+
+    每个 key 对应一个 npz 文件：
+      - bars: (n, 6) float64，列为 timestamp/open/high/low/close/volume
+      - coverage: [lo, hi] 已经请求过的毫秒时间范围（闭区间）
+
+    coverage 单独记录，而不是用首尾 K 线推断，这样上市前的空区间不会每次都重新请求。
+    未收盘的 K 线不会写入缓存。
+    """
+
+    def __init__(self, root=None):
+        self.root = root or CACHE_DIR
+
+    def path(self, exchange_name, symbol, interval):
+        key = f"{exchange_name}|{symbol}|{interval}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{digest}.npz")
+
+    def load(self, exchange_name, symbol, interval):
+        path = self.path(exchange_name, symbol, interval)
+        try:
+            with np.load(path) as f:
+                return f["bars"], tuple(int(t) for t in f["coverage"])
+        except _LOAD_ERRORS:  # 不存在或损坏，按未缓存处理，重新下载后覆盖
+            return None, None
+
+    def save(self, exchange_name, symbol, interval, bars, coverage):
+        _atomic_write(
+            self.path(exchange_name, symbol, interval),
+            "wb",
+            lambda f: np.savez(
+                f,
+                bars=bars,
+                coverage=np.array(coverage, dtype=np.int64),
+                key=np.array(f"{exchange_name}|{symbol}|{interval}"),
+            ),
+        )
+
+    def fetch(self, fetcher, exchange_name, symbol, interval, since, end_time, step):
+        """
+        返回 [since, end_time] 内的 K 线，只对缓存未覆盖的头尾区间调用 fetcher
+
+        fetcher(since, end_time) 返回 ccxt 格式的 ohlcv 列表
+        step 为单根 K 线的毫秒数，用来判断 K 线是否已收盘
+        """
+        bars, coverage = self.load(exchange_name, symbol, interval)
+
+        fetched = []
+        if bars is None:
+            fetched.append(fetcher(since, end_time))
+            bars = np.empty((0, 6))
+            lo, hi = since, end_time
+        else:
+            lo, hi = coverage
+            if since < lo:
+                fetched.append(fetcher(since, lo - 1))
+                lo = since
+            if end_time > hi:
+                fetched.append(fetcher(hi + 1, end_time))
+                hi = end_time
+
+        if fetched:
+            bars = merge_bars(bars, *fetched)
+
+            closed_until = int(time.time() * 1e3) - step
+            self.save(
+                exchange_name,
+                symbol,
+                interval,
+                bars[bars[:, 0] <= closed_until],
+                (lo, min(hi, closed_until)),
+            )
+
+        mask = (bars[:, 0] >= since) & (bars[:, 0] <= end_time)
+        return bars[mask]
+
+
+def merge_bars(*chunks):
+    """合并多段 K 线，按时间排序，时间戳重复时以后面的为准"""
+    arrays = [np.asarray(c, dtype=np.float64).reshape(-1, 6) for c in chunks]
+    bars = np.concatenate(arrays)
+    # 反转后 unique 取到的是每个时间戳最后出现的一行
+    _, index = np.unique(bars[::-1, 0], return_index=True)
+    return bars[::-1][index]
+
+
+MARKETS_CACHE_DIR = os.getenv(
+    "MARKETS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "markets")
+)
+MARKETS_CACHE_TTL = int(os.getenv("MARKETS_CACHE_TTL", 24 * 60 * 60))
+
+
+class MarketsCache:
+    """
+    本地交易所市场信息缓存（load_markets 的结果），每个交易所一个 JSON 文件
+
+    文件包含 markets、currencies 和写入时间 fetched_at，超过 ttl 秒视为过期。
+    """
+
+    def __init__(self, root=None, ttl=None):
+        self.root = root or MARKETS_CACHE_DIR
+        self.ttl = MARKETS_CACHE_TTL if ttl is None else ttl
+
+    def path(self, exchange_name):
+        return os.path.join(self.root, f"{exchange_name}.json")
+
+    def load(self, exchange_name):
+        """返回 (markets, currencies)，不存在、过期或损坏时返回 (None, None)"""
+        try:
+            with open(self.path(exchange_name)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None, None
+        return entry.get("markets"), entry.get("currencies")
+
+    def save(self, exchange_name, markets, currencies=None):
+        entry = {
+            "fetched_at": time.time(),
+            "markets": markets,
+            "currencies": currencies,
+        }
+        _atomic_write(
+            self.path(exchange_name), "w", lambda f: json.dump(entry, f, default=str)
+        )
+
+
+INDICATOR_CACHE_DIR = os.getenv(
+    "INDICATOR_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "indicators"),
+)
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", 1 << 30))
+
+
+class IndicatorCache:
+    """
+    本地指标结果缓存，按 key（指标类型、参数和输入序列的指纹）的哈希存放已计算的指标 line
+
+    每个 key 对应一个 npz 文件：
+      - lines: (line 数, bar 数) float64
+      - minperiod: 指标的 minperiod
+
+    文件的修改时间即最近使用时间，命中时更新；写入后总大小超过 max_bytes 时
+    按最近使用时间从旧到新删除（LRU）。
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or INDICATOR_CACHE_DIR
+        self.max_bytes = INDICATOR_CACHE_SIZE if max_bytes is None else max_bytes
+
+    def path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{digest}.npz")
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with np.load(path) as f:
+                lines, minperiod = f["lines"], int(f["minperiod"])
+        except _LOAD_ERRORS:  # 不存在、被并发淘汰或损坏
+            return None, None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return lines, minperiod
+
+    def save(self, key, lines, minperiod):
+        _atomic_write(
+            self.path(key),
+            "wb",
+            lambda f: np.savez(
+                f,
+                lines=np.asarray(lines, dtype=np.float64),
+                minperiod=np.array(minperiod, dtype=np.int64),
+                key=np.array(key),
+            ),
+        )
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".npz"):
+                with contextlib.suppress(OSError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # 其他进程可能已经删除
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            total -= size
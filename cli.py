@@ -0,0 +1,51 @@
+import importlib
+
+import click
+
+# 子命令: (模块:click 命令, 说明)
+# 模块在执行该子命令时才导入，cli --help 不会导入 backtrader、pandas、ccxt 等；
+# commands 中只定义命令行选项，策略模块在命令执行时才导入，子命令 --help 也不导入它们
+COMMANDS = {
+    "download": ("commands.download:main", "下载K线数据到K线库、K线文件或CSV文件"),
+    "renko": ("commands.renko:main", "Renko 砖型图突破策略"),
+    "reversal": ("commands.reversal:main", "短线反转策略"),
+    "voltarget": ("commands.voltarget:main", "目标波动率策略"),
+    "buyhold": ("commands.buyhold:main", "买入持有"),
+    "momentum": ("commands.momentum:main", "横截面动量策略"),
+    "periodic-dca": ("commands.periodic_dca:main", "定期定额定投"),
+    "rsi-dca": ("commands.rsi_dca:main", "RSI 定投"),
+    "rsi-tp-dca": ("commands.rsi_tp_dca:main", "RSI 定投 + 止盈"),
+    "bbands-dca": ("commands.bbands_dca:main", "布林带定投"),
+    "ema-dca": ("commands.ema_dca:main", "EMA 定投"),
+    "multirun": ("commands.multirun:main", "一次遍历对比多个策略配置"),
+    "sweep": ("commands.sweep:main", "参数扫描"),
+    "walkforward": ("commands.walkforward:main", "walk-forward 优化"),
+    "live": ("commands.live:main", "实时模拟盘或回放测速"),
+    "benchmark": ("commands.benchmark:main", "策略吞吐量基准测试"),
+}
+
+
+class LazyGroup(click.Group):
+    """按 COMMANDS 延迟导入子命令的 click group，命令列表直接使用 COMMANDS 中的说明"""
+
+    def list_commands(self, ctx):
+        return list(COMMANDS)
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in COMMANDS:
+            return None
+        module_name, attr = COMMANDS[cmd_name][0].split(":")
+        return getattr(importlib.import_module(module_name), attr)
+
+    def format_commands(self, ctx, formatter):
+        with formatter.section("Commands"):
+            formatter.write_dl([(name, help) for name, (_, help) in COMMANDS.items()])
+
+
+@click.group(cls=LazyGroup)
+def main():
+    """回测工具统一入口，如 python cli.py renko --help"""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option("--symbol", default="BTC/USDT", help="交易对符号")
+@click.option(
+    "--interval",
+    default="1d",
+    type=click.Choice(["1h", "4h", "1d", "1w"]),
+    help="投资间隔",
+)
+@click.option(
+    "--base-interval", help="只下载该周期的K线并在本地聚合为 --interval，如 1h"
+)
+@click.option("--start-date", default="2020-01-01", help="开始日期 (YYYY-MM-DD格式)")
+@click.option("--end-date", default="2024-12-31", help="结束日期 (YYYY-MM-DD格式)")
+@click.option("--plot", is_flag=True, help="是否绘图)")
+@click.option("--datafile", help="K线库目录或CSV文件")
+@click.option("--fast", is_flag=True, help="使用向量化引擎回测")
+@click.option("--no-indicator-cache", is_flag=True, help="不使用本地指标缓存")
+@profile_options
+def main(**options):
+    from dca.bbands_dca import run
+
+    run(**options)
@@ -0,0 +1,34 @@
+import click
+
+from benchmark import CASES, MOMENTUM_SIZES, SIZES
+
+
+@click.command()
+@click.option(
+    "--case",
+    "-c",
+    "cases",
+    multiple=True,
+    type=click.Choice(list(CASES)),
+    help="只运行指定用例（可多次指定），默认: 全部",
+)
+@click.option(
+    "--size",
+    "-s",
+    "sizes",
+    multiple=True,
+    type=click.Choice(list(SIZES) + list(MOMENTUM_SIZES)),
+    help="只运行指定规模（可多次指定），默认: 全部",
+)
+@click.option("--output", "-o", help="结果写入 JSON 文件")
+@click.option("--compare", help="与之前保存的 JSON 结果比较 bars/s")
+@click.option(
+    "--startup",
+    is_flag=True,
+    help="只检查 cli.py 各命令 --help 的启动耗时预算，超出时退出码为 1",
+)
+def main(**options):
+    """策略吞吐量基准测试（合成K线，不访问网络）"""
+    from benchmark import run
+
+    run(**options)
@@ -0,0 +1,19 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option(
+    "--report",
+    default="buyhold.png",
+    help="报告输出路径（.png/.html），默认: buyhold.png",
+)
+@click.option(
+    "--plot", is_flag=True, help="用 cerebro.plot() 交互式绘图（全部 K 线，较慢）"
+)
+@profile_options
+def main(**options):
+    from buyhold import run
+
+    run(**options)
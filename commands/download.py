@@ -0,0 +1,32 @@
+import click
+
+
+@click.command()
+@click.argument("symbol")
+@click.option("--interval", "-i", default="1d", help="时间间隔，默认: 1d")
+@click.option("--start", "-s", help="开始时间 YYYY-MM-DD")
+@click.option("--end", "-e", help="结束时间 YYYY-MM-DD")
+@click.option(
+    "--format",
+    "-f",
+    "fmt",
+    default="parquet",
+    type=click.Choice(["parquet", "csv", "bars"]),
+    help="输出格式，默认: parquet（按月分区的列式K线库），bars 为可 memmap 的定长记录文件",
+)
+@click.option(
+    "--output",
+    "-o",
+    help="输出路径，默认: parquet 为 bars 目录，csv 为 symbol.csv，bars 为 bars/symbol_interval.npy",
+)
+@click.option("--no-cache", is_flag=True, help="不使用本地K线缓存")
+@click.option(
+    "--base-interval",
+    help="只下载该周期的K线并在本地聚合为 --interval，如 1h 聚合为 4h/1d/1w",
+)
+@click.option("--no-repair", is_flag=True, help="不检查、不补下载缺失的K线")
+def main(**options):
+    """下载加密货币K线数据到列式K线库、定长记录K线文件或CSV文件"""
+    from data import run
+
+    run(**options)
@@ -0,0 +1,35 @@
+import click
+
+
+@click.command()
+@click.argument("strategy")
+@click.option(
+    "--param",
+    "-p",
+    "params",
+    multiple=True,
+    help="策略参数，如 break_count=3（可多次指定）",
+)
+@click.option("--symbol", default="BTC/USDT")
+@click.option("--interval", default="1h")
+@click.option("--exchange", "exchange_name", default="binance")
+@click.option("--warmup", default=500, help="启动时补的历史 K 线数，默认: 500")
+@click.option(
+    "--replay",
+    help="按最快速度回放K线库目录、K线文件（.npy）或CSV文件，测量逐 bar 延迟",
+)
+@click.option("--start-date", help="回放开始日期")
+@click.option("--end-date", help="回放结束日期")
+@click.option("--cash", default=1e8)
+@click.option("--commission", default=0.0005)
+@click.option("--leverage", default=1.0)
+@click.option(
+    "--exactbars",
+    default=1,
+    help="backtrader exactbars，默认: 1（内存不随运行时间增长）",
+)
+def main(**options):
+    """实时模拟盘（轮询交易所）或回放测速，STRATEGY 形如 renko:RenkoStrategy"""
+    from live import run
+
+    run(**options)
@@ -0,0 +1,25 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option(
+    "--report",
+    default="momentum.png",
+    help="报告输出路径（.png/.html），默认: momentum.png",
+)
+@click.option(
+    "--plot", is_flag=True, help="用 cerebro.plot() 交互式绘图（全部 K 线，较慢）"
+)
+@click.option(
+    "--band",
+    type=float,
+    help="每根K线按全部目标权重调仓，偏离不超过该比例（占账户价值）的标的不下单，默认: 只调整权重变化的标的",
+)
+@click.option("--min-notional", default=0.0, help="调仓金额小于该值的标的不下单")
+@profile_options
+def main(**options):
+    from momentum import run
+
+    run(**options)
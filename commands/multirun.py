@@ -0,0 +1,31 @@
+import click
+
+
+@click.command()
+@click.option(
+    "--config",
+    "-c",
+    "configs",
+    multiple=True,
+    help=(
+        "策略配置（可多次指定），形如 rsi_dca 或 rsi_dca@rsi_value=25，"
+        "也可以是 dca.rsi_dca:DCAStrategy@rsi_value=25，默认: 全部定投策略"
+    ),
+)
+@click.option("--symbol", default="BTC/USDT", help="交易对符号")
+@click.option("--interval", default="1d", help="K线周期")
+@click.option(
+    "--base-interval", help="只下载该周期的K线并在本地聚合为 --interval，如 1h"
+)
+@click.option("--start-date", default="2020-01-01", help="开始日期 (YYYY-MM-DD格式)")
+@click.option("--end-date", default="2024-12-31", help="结束日期 (YYYY-MM-DD格式)")
+@click.option("--datafile", help="K线库目录、K线文件（.npy）或CSV文件")
+@click.option("--cash", default=100000.0, help="每个策略的初始资金")
+@click.option("--commission", default=0.001)
+@click.option("--no-share", is_flag=True, help="不共享参数相同的指标")
+@click.option("--no-indicator-cache", is_flag=True, help="不使用本地指标缓存")
+def main(**options):
+    """一次加载数据、一次遍历，对比多个策略配置"""
+    from multirun import run
+
+    run(**options)
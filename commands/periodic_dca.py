@@ -0,0 +1,28 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option("--symbol", default="BTC/USDT", help="交易对符号")
+@click.option(
+    "--interval",
+    default="1m",
+    type=click.Choice(["1d", "1w", "2w", "1m"]),
+    help="投资间隔 (1d: 每日, 1w: 每周, 2w: 每两周, 1m: 每月)",
+)
+@click.option(
+    "--dayoffset",
+    default=1,
+    type=int,
+    help="每月投资日(1-31)或每周投资星期几(1-7)",
+)
+@click.option("--start-date", default="2020-01-01", help="开始日期 (YYYY-MM-DD格式)")
+@click.option("--end-date", default="2024-12-31", help="结束日期 (YYYY-MM-DD格式)")
+@click.option("--amount", default=60000, type=float, help="总投资金额")
+@click.option("--sweep", is_flag=True, help="一次计算所有投资间隔和投资日的组合")
+@profile_options
+def main(**options):
+    from dca.periodic_dca import run
+
+    run(**options)
@@ -0,0 +1,27 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option("--symbol", default="BTC/USDT")
+@click.option("--datafile")
+@click.option("--interval", default="1h")
+@click.option(
+    "--base-interval", help="只下载该周期的K线并在本地聚合为 --interval，如 1h"
+)
+@click.option("--start-date", default="2020-01-01")
+@click.option("--end-date", default="2025-11-30")
+@click.option("--break-count", default=3)
+@click.option(
+    "--report", default="renko.png", help="报告输出路径（.png/.html），默认: renko.png"
+)
+@click.option(
+    "--plot", is_flag=True, help="用 cerebro.plot() 交互式绘图（全部 K 线，较慢）"
+)
+@click.option("--no-indicator-cache", is_flag=True, help="不使用本地指标缓存")
+@profile_options
+def main(**options):
+    from renko import run
+
+    run(**options)
@@ -0,0 +1,29 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option("--symbol", default="ETH/USDT", help="标的标识")
+@click.option("--start-date", default="2020-01-01", help="开始时间")
+@click.option("--end-date", default="2025-11-30", help="结束时间")
+@click.option("--interval", default="1h", help="结束时间")
+@click.option(
+    "--base-interval", help="只下载该周期的K线并在本地聚合为 --interval，如 1h"
+)
+@click.option("--datafile", help="K线库目录或CSV文件")
+@click.option("--fast", is_flag=True, help="使用向量化引擎回测（不绘图）")
+@click.option(
+    "--report",
+    default="reversal.png",
+    help="报告输出路径（.png/.html），默认: reversal.png",
+)
+@click.option(
+    "--plot", is_flag=True, help="用 cerebro.plot() 交互式绘图（全部 K 线，较慢）"
+)
+@click.option("--no-indicator-cache", is_flag=True, help="不使用本地指标缓存")
+@profile_options
+def main(**options):
+    from reversal import run
+
+    run(**options)
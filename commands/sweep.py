@@ -0,0 +1,40 @@
+import click
+
+
+@click.command()
+@click.argument("strategy")
+@click.option(
+    "--param",
+    "-p",
+    "params",
+    multiple=True,
+    help="参数网格，如 break_count=2,3,4（可多次指定）",
+)
+@click.option("--symbol", default="BTC/USDT")
+@click.option("--datafile", help="K线库目录、K线文件（.npy）或CSV文件")
+@click.option("--interval", default="1h")
+@click.option(
+    "--base-interval", help="只下载该周期的K线并在本地聚合为 --interval，如 1h"
+)
+@click.option("--start-date", default="2020-01-01")
+@click.option("--end-date", default="2025-11-30")
+@click.option("--cash", default=1e8)
+@click.option("--commission", default=0.0005)
+@click.option("--leverage", default=1.0)
+@click.option("--processes", type=int, help="进程数，默认: CPU 核数")
+@click.option(
+    "--output",
+    "-o",
+    help="结果文件（JSON Lines），已存在时跳过已完成的组合；策略、数据或 broker 设置不同时报错",
+)
+@click.option("--no-indicator-cache", is_flag=True, help="不使用本地指标缓存")
+@click.option(
+    "--low-memory",
+    is_flag=True,
+    help="worker 不 preload（exactbars=1），逐根读取共享内存或 K 线文件，不为每个进程拷贝 K 线，回测较慢且不使用指标缓存",
+)
+def main(**options):
+    """参数扫描，STRATEGY 形如 renko:RenkoStrategy"""
+    from sweep import run
+
+    run(**options)
@@ -0,0 +1,26 @@
+import click
+
+from profiling import profile_options
+
+
+@click.command()
+@click.option("--symbol", default="SPY", help="")
+@click.option("--max-leverage", default=1.5, help="")
+@click.option("--target-volatility", default=0.2, help="")
+@click.option("--start-date", default="2015-01-01", help="")
+@click.option("--end-date", default="2025-11-30", help="")
+@click.option("--fast", is_flag=True, help="使用向量化引擎回测（不绘图）")
+@click.option(
+    "--report",
+    default="voltarget.png",
+    help="报告输出路径（.png/.html），默认: voltarget.png",
+)
+@click.option(
+    "--plot", is_flag=True, help="用 cerebro.plot() 交互式绘图（全部 K 线，较慢）"
+)
+@click.option("--no-indicator-cache", is_flag=True, help="不使用本地指标缓存")
+@profile_options
+def main(**options):
+    from voltarget import run
+
+    run(**options)
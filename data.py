@@ -1,8 +1,12 @@
 import os
+import time
 import click
-import ccxt
 import pytz
 import datetime
+import threading
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import numpy as np
@@ -10,6 +14,11 @@ import numpy as np
 from dateutil.parser import parse as datetime_parse
 from dateutil.relativedelta import relativedelta
 
+from barfile import bar_file, bars_frame, is_bar_file, open_bars, slice_bars, write_bars
+from cache import MarketsCache, OHLCVCache
+from integrity import check_bars, format_report, repair_bars
+from resample import base_step, interval_ms, resample
+
 params = {
     "enableRateLimit": True,
     "proxies": {
@@ -19,21 +28,90 @@ params = {
 }
 
 exchanges = {}
+rate_limiters = {}
+exchanges_lock = threading.Lock()
+markets_locks = collections.defaultdict(threading.Lock)
+
+
+class RateLimiter:
+    """
+    线程安全的请求节流器，保证同一交易所的请求间隔不小于 rateLimit 毫秒
+
+    ccxt 自带的 enableRateLimit 只记录上一次请求时间，多个线程共用一个实例时会互相踩踏
+    """
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1e3
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
 
 
 def create_exchange(name):
-    if name in exchanges:
-        return exchanges[name]
-    else:
-        if not hasattr(ccxt, name):
-            raise ValueError(f"Not supported exchange: {name}")
-        exchanges[name] = getattr(ccxt, name)(params)
-        return exchanges[name]
+    """
+    取得交易所实例：每个进程每个交易所只创建一次（一个 HTTP 会话），各线程、各次调用共用
+
+    实例在第一次使用时创建，不会加载市场信息，需要时调用 load_markets()。
+    ccxt 导入需要数百毫秒，也推迟到第一次创建实例时
+    """
+    import ccxt
+
+    with exchanges_lock:
+        if name in exchanges:
+            return exchanges[name]
+        else:
+            if not hasattr(ccxt, name):
+                raise ValueError(f"Not supported exchange: {name}")
+            exchanges[name] = getattr(ccxt, name)(params)
+            return exchanges[name]
+
+
+def rate_limiter(name):
+    exchange = create_exchange(name)
+    with exchanges_lock:
+        if name not in rate_limiters:
+            rate_limiters[name] = RateLimiter(getattr(exchange, "rateLimit", 0))
+        return rate_limiters[name]
+
+
+def load_markets(name, cache=True, reload=False):
+    """
+    加载交易所的市场信息，每个进程每个交易所只加载一次
+
+    cache 为 True 时优先读取本地缓存（见 MarketsCache），缓存不存在或过期才请求交易所，
+    请求结果写回缓存；多个线程同时调用时只有一个线程请求，其余等待后直接返回。
+    reload 为 True 时忽略内存和本地缓存，重新请求
+    """
+    exchange = create_exchange(name)
+    with exchanges_lock:
+        lock = markets_locks[name]
+
+    with lock:
+        if exchange.markets and not reload:
+            return exchange.markets
+
+        if cache is True:
+            cache = MarketsCache()
+        if cache and not reload:
+            markets, currencies = cache.load(name)
+            if markets:
+                return exchange.set_markets(markets, currencies)
+
+        markets = exchange.load_markets(reload=True)
+        if cache:
+            cache.save(name, markets, exchange.currencies)
+        return markets
 
 
 def symbols(market="swap.linear", quote_ccy="USDT", exchange_name="binance"):
-    exchange = create_exchange(exchange_name)
-    markets = exchange.load_markets()
+    markets = load_markets(exchange_name)
 
     market_type, market_subtype = market.split(".")
     return [
@@ -70,35 +148,82 @@ def validate_date_range(start_date, end_date):
     return start_date, end_date
 
 
-def download(
-    symbol: str, start_date=None, end_date=None, interval="1d", exchange_name="binance"
-):
-    start_date, end_date = validate_date_range(start_date, end_date)
+def ohlcv_limit(exchange, symbol, default=100):
+    """根据 ccxt 的 features 取得单次 fetch_ohlcv 允许的最大条数"""
+    features = getattr(exchange, "features", None) or {}
+    if ":" in symbol:
+        pair, settle = symbol.split(":", 1)
+        quote = pair.split("/")[-1]
+        subtype = "linear" if settle.split("-")[0] == quote else "inverse"
+        features = (features.get("swap") or {}).get(subtype) or {}
+    else:
+        features = features.get("spot") or {}
+    return (features.get("fetchOHLCV") or {}).get("limit") or default
 
-    exchange = create_exchange(exchange_name)
 
-    max_limit = 100
-    since = int(start_date.timestamp() * 1e3)
-    end_time = int(end_date.timestamp() * 1e3)
+def fetch_ohlcvs(
+    exchange,
+    symbol,
+    since,
+    end_time,
+    interval="1d",
+    limiter=None,
+    limit=None,
+    concurrency=4,
+):
+    """
+    分页下载 [since, end_time] 内的 K 线
 
-    ohlcvs = []
-    while True:
-        new_ohlcvs = exchange.fetch_ohlcv(
+    第一页串行请求，用返回的第一根 K 线对齐时间网格（跳过上市前的空区间），
+    之后每页的起点由 interval 推算，最多 concurrency 页同时请求，按顺序拼接。
+    页数在请求前已经确定，不需要额外的空页请求来判断结束。
+    """
+    step = interval_ms(interval)
+    if limit is None:
+        limit = ohlcv_limit(exchange, symbol)
+
+    def request(page_since):
+        if limiter is not None:
+            limiter.wait()
+        return exchange.fetch_ohlcv(
             symbol=symbol,
-            since=since,
+            since=page_since,
             timeframe=interval,
-            limit=max_limit,
+            limit=limit,
         )
-        new_ohlcvs = [ohlcv for ohlcv in new_ohlcvs if ohlcv[0] <= end_time]
-        if len(new_ohlcvs) == 0:
-            break
-        ohlcvs += new_ohlcvs
 
-        since = ohlcvs[-1][0] + 1000
+    def fetch_page(page_since):
+        page_end = min(page_since + limit * step - 1, end_time)
+        return [
+            ohlcv for ohlcv in request(page_since) if page_since <= ohlcv[0] <= page_end
+        ]
+
+    # 起点可能早于上市时间，交易所会从第一根 K 线开始返回
+    first_page = [ohlcv for ohlcv in request(since) if since <= ohlcv[0] <= end_time]
+    if len(first_page) == 0:
+        return []
 
+    ohlcvs = list(first_page)
+    page_starts = range(ohlcvs[-1][0] + step, end_time + 1, limit * step)
+    if len(page_starts) <= 1 or concurrency <= 1:
+        for page_since in page_starts:
+            ohlcvs += fetch_page(page_since)
+        return ohlcvs
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for page in executor.map(fetch_page, page_starts):
+            ohlcvs += page
+
+    return ohlcvs
+
+
+def to_dataframe(ohlcvs, symbol):
     columns = ["timestamp", "open", "high", "low", "close", "volume"]
     data = pd.DataFrame(ohlcvs, columns=np.array(columns))
-    data.drop_duplicates(inplace=True)
+    data["timestamp"] = data["timestamp"].astype("int64")
+    # 同一时间戳只保留最后一根（数值可能因 K 线未收盘而不同），按时间排序
+    data.drop_duplicates(subset="timestamp", keep="last", inplace=True)
+    data.sort_values("timestamp", inplace=True)
     data["datetime"] = pd.to_datetime(data["timestamp"], unit="ms", utc=True)
     data.set_index("datetime", inplace=True)
     data.drop(columns=["timestamp"], inplace=True)
@@ -107,34 +232,236 @@ def download(
     return data
 
 
-@click.command()
-@click.argument("symbol")
-@click.option("--interval", "-i", default="1d", help="时间间隔，默认: 1d")
-@click.option("--start", "-s", help="开始时间 YYYY-MM-DD")
-@click.option("--end", "-e", help="结束时间 YYYY-MM-DD")
-@click.option("--output", "-o", help="输出文件，默认: symbol.csv")
-def main(symbol, interval, start, end, output):
-    """下载加密货币K线数据到CSV文件"""
+def download(
+    symbol: str,
+    start_date=None,
+    end_date=None,
+    interval="1d",
+    exchange_name="binance",
+    cache=True,
+    limiter=None,
+    base_interval=None,
+    repair=True,
+):
+    """
+    下载 K 线；base_interval 不为空且与 interval 不同时，只下载（或从缓存读取）base_interval 的 K 线，
+    在本地聚合为 interval，多个周期共用一份缓存，切换周期不再请求网络
+
+    repair 为 True 时新下载的 K 线先检查缺口，只对缺口所在区间补下载，补齐后再写入缓存（见 repair_bars）。
+    返回的 DataFrame 的 attrs["integrity"] 为 check_bars 的报告（base_interval 时为基础周期的报告），
+    refetched 为本次补回的根数，gaps/missing 为仍然缺少的（如交易所停机）
+    """
+    if base_interval and base_interval != interval:
+        # 月线等长度不固定的周期不能作为基础周期，下载前检查
+        base_step(base_interval)
+        data = download(
+            symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=base_interval,
+            exchange_name=exchange_name,
+            cache=cache,
+            limiter=limiter,
+            repair=repair,
+        )
+        resampled = resample(data, interval, base_interval)
+        resampled.attrs["integrity"] = data.attrs["integrity"]
+        return resampled
+
+    start_date, end_date = validate_date_range(start_date, end_date)
+
+    exchange = create_exchange(exchange_name)
+    # fetch_ohlcv 内部会调用 load_markets，先在锁内加载，避免多个线程各请求一次
+    load_markets(exchange_name)
+
+    since = int(start_date.timestamp() * 1e3)
+    end_time = int(end_date.timestamp() * 1e3)
+
+    if limiter is None:
+        limiter = rate_limiter(exchange_name)
+
+    def fetch(since, end_time):
+        return fetch_ohlcvs(
+            exchange, symbol, since, end_time, interval=interval, limiter=limiter
+        )
+
+    # 一次请求能覆盖的跨度内的多个缺口合并补下载
+    span = ohlcv_limit(exchange, symbol) * interval_ms(interval)
+    refetched = []
+
+    def fetcher(since, end_time):
+        ohlcvs = fetch(since, end_time)
+        if not repair:
+            return ohlcvs
+        bars, report = repair_bars(ohlcvs, fetch, interval, span=span)
+        refetched.append(report["refetched"])
+        return bars
+
+    if cache:
+        if cache is True:
+            cache = OHLCVCache()
+        ohlcvs = cache.fetch(
+            fetcher,
+            exchange_name,
+            symbol,
+            interval,
+            since,
+            end_time,
+            step=interval_ms(interval),
+        )
+    else:
+        ohlcvs = fetcher(since, end_time)
+
+    report = check_bars(
+        np.asarray(ohlcvs, dtype=np.float64).reshape(-1, 6)[:, 0], interval
+    )
+    report["refetched"] = sum(refetched)
+    data = to_dataframe(ohlcvs, symbol)
+    data.attrs["integrity"] = report
+    return data
+
+
+def download_many(
+    symbols,
+    start_date=None,
+    end_date=None,
+    interval="1d",
+    exchange_name="binance",
+    cache=True,
+    max_workers=8,
+    base_interval=None,
+    repair=True,
+):
+    """
+    并发下载多个标的，返回按 symbols 顺序排列的 {symbol: DataFrame}
+
+    所有线程共用 create_exchange 缓存的交易所实例和同一个 RateLimiter，
+    总请求速率受交易所限频约束，耗时不再随标的个数乘以网络延迟增长
+    """
+    limiter = rate_limiter(exchange_name)
+    symbols = list(dict.fromkeys(symbols))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            symbol: executor.submit(
+                download,
+                symbol,
+                start_date=start_date,
+                end_date=end_date,
+                interval=interval,
+                exchange_name=exchange_name,
+                cache=cache,
+                limiter=limiter,
+                base_interval=base_interval,
+                repair=repair,
+            )
+            for symbol in symbols
+        }
+        return {symbol: future.result() for symbol, future in futures.items()}
+
+
+def load(
+    symbol: str,
+    start_date=None,
+    end_date=None,
+    interval="1d",
+    datafile=None,
+    exchange_name="binance",
+    base_interval=None,
+):
+    """
+    读取 K 线：datafile 为目录时从列式 K 线库读取，为 .npy 时从定长记录的 K 线文件读取，
+    为其它文件时按 CSV 读取，否则调用 download()
+
+    base_interval 不为空且与 interval 不同时，读取 base_interval 的 K 线并聚合为 interval
+    （datafile 应为 base_interval 的数据）
+    """
+    if base_interval and base_interval != interval:
+        data = load(
+            symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=base_interval,
+            datafile=datafile,
+            exchange_name=exchange_name,
+        )
+        return resample(data, interval, base_interval)
+
+    if datafile is None:
+        return download(
+            symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            exchange_name=exchange_name,
+        )
+
+    if os.path.isdir(datafile):
+        from store import load_bars
 
+        return load_bars(
+            datafile, symbol, interval, start_date=start_date, end_date=end_date
+        )
+
+    if is_bar_file(datafile):
+        bars = slice_bars(open_bars(datafile), start_date, end_date)
+        return bars_frame(bars, symbol)
+
+    return pd.read_csv(datafile, parse_dates=["datetime"], index_col=[0])
+
+
+def run(symbol, interval, start, end, fmt, output, no_cache, base_interval, no_repair):
     if output is None:
-        output = f"{symbol.replace('/', '_')}.csv"
+        if fmt == "parquet":
+            output = "bars"
+        elif fmt == "bars":
+            output = bar_file("bars", symbol, interval)
+        else:
+            output = f"{symbol.replace('/', '_')}.csv"
 
     click.echo(f"下载 {symbol} 数据...")
     click.echo(f"间隔: {interval}")
     click.echo(f"时间范围: {start or '默认'} 到 {end or '默认'}")
 
     # 下载数据
-    data = download(symbol=symbol, start_date=start, end_date=end, interval=interval)
+    data = download(
+        symbol=symbol,
+        start_date=start,
+        end_date=end,
+        interval=interval,
+        cache=not no_cache,
+        base_interval=base_interval,
+        repair=not no_repair,
+    )
 
     if data.empty:
         click.echo("错误: 没有获取到数据", err=True)
         return
 
-    # 保存到CSV
-    data.to_csv(output)
-    click.echo(f"数据已保存到: {output}")
+    report = format_report(data.attrs["integrity"])
+    if report:
+        click.echo(f"数据检查: {report}")
+        for before, after, missing in data.attrs["integrity"]["gaps"]:
+            click.echo(
+                f"  缺少 {missing} 根: {pd.to_datetime(before, unit='ms')} 到 "
+                f"{pd.to_datetime(after, unit='ms')} 之间"
+            )
+
+    if fmt == "parquet":
+        from store import save_bars
+
+        path = save_bars(data, output, symbol, interval)
+        click.echo(f"数据已保存到: {path}")
+    elif fmt == "bars":
+        write_bars(data, output)
+        click.echo(f"数据已保存到: {output}")
+    else:
+        data.to_csv(output)
+        click.echo(f"数据已保存到: {output}")
     click.echo(f"共 {len(data)} 条记录")
 
 
 if __name__ == "__main__":
+    from commands.download import main
+
     main()
@@ -1,11 +1,14 @@
+import numpy as np
 import pandas as pd
 import datetime
-import matplotlib.pyplot as plt
 
-import click
 import backtrader as bt
 
-from data import download
+from data import load
+from feeds.arrayfeed import ArrayData
+from profiling import Profiler
+from indicators.cached import CachedIndicators
+from engine import backtest, sma, stddev
 
 import warnings
 
@@ -57,25 +60,54 @@ class DCAStrategy(bt.Strategy):
         print(f"{title} | {average_price:.2f} | {self.count}")
 
 
-@click.command()
-@click.option("--symbol", default="BTC/USDT", help="交易对符号")
-@click.option(
-    "--interval",
-    default="1d",
-    type=click.Choice(["1h", "4h", "1d", "1w"]),
-    help="投资间隔",
-)
-@click.option("--start-date", default="2020-01-01", help="开始日期 (YYYY-MM-DD格式)")
-@click.option("--end-date", default="2024-12-31", help="结束日期 (YYYY-MM-DD格式)")
-@click.option("--plot", is_flag=True, help="是否绘图)")
-def main(symbol, interval, start_date, end_date, plot):
+def vector_orders(df, investment_amount=100):
+    """DCAStrategy 每根 bar 的买入金额（NaN 为不买入），供 engine.backtest 使用"""
+    close = df["close"].to_numpy()
+    botband = sma(close, 20) - 2 * stddev(close, 20)
+    return np.where(close < botband, float(investment_amount), np.nan)
+
+
+def run(
+    symbol,
+    interval,
+    base_interval,
+    start_date,
+    end_date,
+    plot,
+    datafile,
+    fast,
+    no_indicator_cache,
+    profile,
+    cprofile,
+    profile_output,
+):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d")
     end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d")
 
+    with profiler.phase("download"):
+        df = load(
+            symbol,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            datafile=datafile,
+            base_interval=base_interval,
+        )
+    if fast:
+        orders = vector_orders(df, investment_amount=1000)
+        with profiler.phase("vector"):
+            result = backtest(df, order_value=orders, cash=1e8, commission=0.001)
+        invested = np.nansum(orders)
+        count = np.count_nonzero(~np.isnan(orders))
+        average_price = invested / result.position if result.position else 0
+        print(f"{strategy_title(interval)} | {average_price:.2f} | {count}")
+        profiler.finish(profile_output)
+        return
+
     cerebro = bt.Cerebro()
 
-    data = download(symbol, interval=interval, start_date=start_date, end_date=end_date)
-    data = bt.feeds.PandasData(dataname=data)  # pyright: ignore
+    data = ArrayData(dataname=df)  # pyright: ignore
     cerebro.adddata(data)
 
     cerebro.broker.setcash(1e8)
@@ -88,14 +120,21 @@ def main(symbol, interval, start_date, end_date, plot):
     )
 
     cerebro.addanalyzer(bt.analyzers.timereturn.TimeReturn, _name="timereturn")
-    strat = cerebro.run()
+    with CachedIndicators(not no_indicator_cache):
+        strat = profiler.run(cerebro)
 
     if not plot:
+        profiler.finish(profile_output)
         return
+
+    # matplotlib 导入较慢，只在画图时导入
+    import matplotlib.pyplot as plt
+
     returns = strat[0].analyzers.getbyname("timereturn").get_analysis()
     returns_series = pd.Series(returns)
     net_value = (1 + returns_series).cumprod()
-    ax = net_value.plot(title="Returns", figsize=(12, 5))
+    with profiler.phase("plot"):
+        ax = net_value.plot(title="Returns", figsize=(12, 5))
 
     end_value = net_value.iloc[-1]
     end_index = net_value.index[-1]
@@ -109,8 +148,11 @@ def main(symbol, interval, start_date, end_date, plot):
         bbox=dict(facecolor="white", alpha=0.8),
     )
 
+    profiler.finish(profile_output)
     plt.show()
 
 
 if __name__ == "__main__":
+    from commands.bbands_dca import main
+
     main()
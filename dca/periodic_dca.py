@@ -1,112 +1,11 @@
-import os
-import ccxt
-import pytz
 import pandas as pd
 import numpy as np
 import datetime
 
-from dateutil.parser import parse as datetime_parse
-from dateutil.relativedelta import relativedelta
-
-import click
 import backtrader as bt
-
-
-params = {
-    "enableRateLimit": True,
-    "proxies": {
-        "http": os.getenv("http_proxy"),
-        "https": os.getenv("http_proxy"),
-    },
-}
-
-exchanges = {}
-
-
-def create_exchange(name):
-    if name in exchanges:
-        return exchanges[name]
-    else:
-        if not hasattr(ccxt, name):
-            raise ValueError(f"Not supported exchange: {name}")
-        exchanges[name] = getattr(ccxt, name)(params)
-        return exchanges[name]
-
-
-def symbols(market="swap.linear", quote_ccy="USDT", exchange_name="binance"):
-    exchange = create_exchange(exchange_name)
-    markets = exchange.load_markets()
-
-    market_type, market_subtype = market.split(".")
-    return [
-        m["symbol"]
-        for m in markets.values()
-        if m["active"]
-        and m[market_type]
-        and m[market_subtype]
-        and m["quoteId"] == quote_ccy
-    ]
-
-
-def validate_date_range(start_date, end_date):
-    if end_date is None:
-        end_date = datetime.datetime.now(pytz.UTC)
-    elif isinstance(end_date, str):
-        end_date = datetime_parse(end_date)
-        end_date = end_date.replace(tzinfo=pytz.UTC)
-    else:
-        end_date = end_date.replace(tzinfo=pytz.UTC)
-
-    current_date = datetime.datetime.now(pytz.UTC)
-    if end_date > current_date:
-        end_date = current_date
-
-    if start_date is None:
-        start_date = end_date - relativedelta(years=3)
-    elif isinstance(start_date, str):
-        start_date = datetime_parse(start_date)
-        start_date = start_date.replace(tzinfo=pytz.UTC)
-    else:
-        start_date = start_date.replace(tzinfo=pytz.UTC)
-
-    return start_date, end_date
-
-
-def download(
-    symbol: str, start_date=None, end_date=None, interval="1d", exchange_name="binance"
-):
-    start_date, end_date = validate_date_range(start_date, end_date)
-
-    exchange = create_exchange(exchange_name)
-
-    max_limit = 100
-    since = int(start_date.timestamp() * 1e3)
-    end_time = int(end_date.timestamp() * 1e3)
-
-    ohlcvs = []
-    while True:
-        new_ohlcvs = exchange.fetch_ohlcv(
-            symbol=symbol,
-            since=since,
-            timeframe=interval,
-            limit=max_limit,
-        )
-        new_ohlcvs = [ohlcv for ohlcv in new_ohlcvs if ohlcv[0] <= end_time]
-        if len(new_ohlcvs) == 0:
-            break
-        ohlcvs += new_ohlcvs
-
-        since = ohlcvs[-1][0] + 1000
-
-    columns = ["timestamp", "open", "high", "low", "close", "volume"]
-    data = pd.DataFrame(ohlcvs, columns=np.array(columns))
-    data.drop_duplicates(inplace=True)
-    data["datetime"] = pd.to_datetime(data["timestamp"], unit="ms", utc=True)
-    data.set_index("datetime", inplace=True)
-    data.drop(columns=["timestamp"], inplace=True)
-    data["symbol"] = symbol
-
-    return data
+from data import download
+from feeds.arrayfeed import ArrayData
+from profiling import Profiler
 
 
 def strategy_title(interval, dayoffset):
@@ -121,14 +20,59 @@ def strategy_title(interval, dayoffset):
         return "每日"
 
 
-def next_month_day(dt, day):
-    if dt.month == 12:
-        year = dt.year + 1
-        month = 1
+def schedule_dates(first_date, last_date, dayoffset, interval="1d"):
+    """
+    生成 [first_date, last_date] 内的定投日期（numpy datetime64[D] 数组）
+
+    1w/2w 的 dayoffset 为星期几(1-7)，1m 的 dayoffset 为几号(1-31)，
+    月份天数不足时取当月最后一天（如 31 号在 2 月为 28/29 号）
+    """
+    first = np.datetime64(first_date, "D")
+    last = np.datetime64(last_date, "D")
+
+    if interval == "1m":
+        month = first.astype("datetime64[M]")
+        day = min(dayoffset, _month_days(month))
+        if (first - month).astype(int) + 1 > day:
+            month += 1
+        months = np.arange(month, last.astype("datetime64[M]") + 1)
+        days = np.minimum(dayoffset, _month_days(months))
+        dates = months.astype("datetime64[D]") + (days - 1)
     else:
-        year = dt.year
-        month = dt.month + 1
-    return datetime.date(year=year, month=month, day=day)
+        step = {"1d": 1, "1w": 7, "2w": 14}[interval]
+        if interval == "1d":
+            start = first
+        else:
+            # 1970-01-01 为星期四，weekday 0 为星期一
+            weekday = (first.astype(int) + 3) % 7
+            start = first + (dayoffset - 1 - weekday) % 7
+        dates = np.arange(start, last + 1, step)
+
+    return dates[dates <= last]
+
+
+def _month_days(months):
+    return (
+        (months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")
+    ).astype(int)
+
+
+def investment_bars(bar_dates, dayoffset, interval="1d"):
+    """
+    把定投日期映射到 K 线下标：每个定投日在第一根日期 >= 定投日的 K 线买入
+
+    与逐 bar 比较日期的实现一致：K 线有缺口时，错过的定投日在之后的 K 线上逐根补投，
+    即 b_k = max(s_k, b_{k-1} + 1)，等价于 k + cummax(s_k - k)
+    """
+    bar_dates = np.asarray(bar_dates, dtype="datetime64[D]")
+    if len(bar_dates) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    dates = schedule_dates(bar_dates[0], bar_dates[-1], dayoffset, interval)
+    first_bars = np.searchsorted(bar_dates, dates, side="left")
+    k = np.arange(len(first_bars))
+    bars = k + np.maximum.accumulate(first_bars - k)
+    return bars[bars < len(bar_dates)]
 
 
 def investment_times(start_date, end_date, interval="1d"):
@@ -145,39 +89,10 @@ def investment_times(start_date, end_date, interval="1d"):
         return 0
 
 
-def start_investment_date(current_date, dayoffset, interval="1d"):
-    if interval == "1d":
-        return current_date
-    elif interval == "1w":
-        if current_date.weekday() <= dayoffset - 1:
-            days_ahead = dayoffset - 1 - current_date.weekday()
-            return current_date + datetime.timedelta(days=days_ahead)
-        else:
-            days_ahead = dayoffset - 1 - current_date.weekday() + 7
-            return current_date + datetime.timedelta(days=days_ahead)
-    elif interval == "2w":
-        if current_date.weekday() <= dayoffset - 1:
-            days_ahead = dayoffset - 1 - current_date.weekday()
-            return current_date + datetime.timedelta(days=days_ahead)
-        else:
-            days_ahead = dayoffset - 1 - current_date.weekday() + 7
-            return current_date + datetime.timedelta(days=days_ahead)
-    elif interval == "1m":
-        if current_date.day <= dayoffset:
-            return datetime.date(current_date.year, current_date.month, dayoffset)
-        else:
-            return next_month_day(current_date, dayoffset)
-
-
-def next_investment_date(pre_investment_date, dayoffset=0, interval="1d"):
-    if interval == "1d":
-        return pre_investment_date + datetime.timedelta(days=1)
-    elif interval == "1w":
-        return pre_investment_date + datetime.timedelta(days=7)
-    elif interval == "2w":
-        return pre_investment_date + datetime.timedelta(days=14)
-    elif interval == "1m":
-        return next_month_day(pre_investment_date, dayoffset)
+def bt_dates(nums):
+    """backtrader 的日期数值（ordinal + 日内小数）转为 datetime64[D]"""
+    ordinals = np.floor(np.asarray(nums)).astype(np.int64)
+    return np.datetime64("0001-01-01", "D") + (ordinals - 1)
 
 
 class DCAStrategy(bt.Strategy):
@@ -191,18 +106,48 @@ class DCAStrategy(bt.Strategy):
         self.total_invested = 0.0
         self.invested_amount = 0
 
-        self.investment_date = None
+    def start(self):
+        self.next_investment = 0
+        if not self.env._dopreload:
+            # 不 preload 时 K 线逐根加载，next 中逐根比较日期（见 investment_due）
+            self.investment_bars = None
+            self.first_date = None
+            self.schedule = np.empty(0, dtype="datetime64[D]")
+            return
 
-    def next(self):
-        current_date = self.data.datetime.date(0)
-        if not self.investment_date:
-            self.investment_date = start_investment_date(
-                current_date,
+        # preload 时一次性算出所有定投 K 线的下标，next 中只做整数比较
+        bar_dates = bt_dates(self.data.datetime.array)
+        self.investment_bars = investment_bars(
+            bar_dates,
+            self.p.investment_dayoffset,
+            self.p.investment_interval,
+        ).tolist()
+        self.investment_bars.append(-1)
+
+    def investment_due(self):
+        """
+        不 preload 时：当前 K 线的日期已到下一个定投日
+
+        定投日期从第一根 K 线起算，用完时向后再生成一年；每根 K 线最多投一次，
+        错过的定投日在之后的 K 线上逐根补投，与 investment_bars 一致
+        """
+        date = bt_dates([self.data.datetime[0]])[0]
+        if self.first_date is None:
+            self.first_date = date
+        if self.next_investment >= len(self.schedule):
+            self.schedule = schedule_dates(
+                self.first_date,
+                date + 366,
                 self.p.investment_dayoffset,
                 self.p.investment_interval,
             )
+        return date >= self.schedule[self.next_investment]
 
-        if current_date < self.investment_date:
+    def next(self):
+        if self.investment_bars is None:
+            if not self.investment_due():
+                return
+        elif len(self) - 1 != self.investment_bars[self.next_investment]:
             return
 
         price = self.data.close[0]
@@ -210,47 +155,88 @@ class DCAStrategy(bt.Strategy):
         self.buy(size=size)
 
         self.total_invested += self.p.investment_amount
-        self.investment_date = next_investment_date(
-            self.investment_date,
-            self.p.investment_dayoffset,
-            interval=self.p.investment_interval,
-        )
+        self.next_investment += 1
 
     def stop(self):
         title = strategy_title(self.p.investment_interval, self.p.investment_dayoffset)
-        average_price = self.total_invested / self.position.size
+        # 没有成交（如数据太短）时持仓为 0
+        size = self.position.size
+        average_price = self.total_invested / size if size else float("nan")
         print(
             f"{title} | {self.p.investment_amount:.2f}| {self.total_invested:.2f} | {self.position.size:.2f} | {average_price:.2f}"
         )
 
 
-@click.command()
-@click.option("--symbol", default="BTC/USDT", help="交易对符号")
-@click.option(
-    "--interval",
-    default="1m",
-    type=click.Choice(["1d", "1w", "2w", "1m"]),
-    help="投资间隔 (1d: 每日, 1w: 每周, 2w: 每两周, 1m: 每月)",
-)
-@click.option(
-    "--dayoffset",
-    default=1,
-    type=int,
-    help="每月投资日(1-31)或每周投资星期几(1-7)",
-)
-@click.option("--start-date", default="2020-01-01", help="开始日期 (YYYY-MM-DD格式)")
-@click.option("--end-date", default="2024-12-31", help="结束日期 (YYYY-MM-DD格式)")
-@click.option("--amount", default=60000, type=float, help="总投资金额")
-def main(symbol, interval, dayoffset, start_date, end_date, amount):
+def sweep_schedules(df, start_date, end_date, amount):
+    """
+    一次遍历数据，计算所有 interval × dayoffset 组合的定投结果
+
+    成交规则与 DCAStrategy 一致：按收盘价计算数量，最后一根 K 线的订单不会成交
+    """
+    close = df["close"].to_numpy(dtype=np.float64)
+    bar_dates = df.index.tz_convert("UTC").tz_localize(None).to_numpy("datetime64[D]")
+
+    combos = [("1d", 1)]
+    combos += [(interval, d) for interval in ("1w", "2w") for d in range(1, 8)]
+    combos += [("1m", d) for d in range(1, 32)]
+
+    rows = []
+    for interval, dayoffset in combos:
+        investment_amount = amount / investment_times(
+            start_date, end_date, interval=interval
+        )
+        bars = investment_bars(bar_dates, dayoffset, interval)
+        filled = bars[bars < len(close) - 1]
+        size = np.sum(investment_amount / close[filled])
+        total_invested = investment_amount * len(bars)
+        rows.append(
+            {
+                "interval": interval,
+                "dayoffset": dayoffset,
+                "title": strategy_title(interval, dayoffset),
+                "investment_amount": investment_amount,
+                "total_invested": total_invested,
+                "size": size,
+                "average_price": total_invested / size if size else 0.0,
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
+def run(
+    symbol,
+    interval,
+    dayoffset,
+    start_date,
+    end_date,
+    amount,
+    sweep,
+    profile,
+    cprofile,
+    profile_output,
+):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     # Convert string dates to datetime objects
     start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d")
     end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d")
 
-    cerebro = bt.Cerebro()
+    with profiler.phase("download"):
+        df = download(symbol, start_date=start_date, end_date=end_date, interval="1d")
 
-    data = download(symbol, start_date=start_date, end_date=end_date, interval="1d")
+    if sweep:
+        with profiler.phase("vector"):
+            table = sweep_schedules(df, start_date, end_date, amount)
+        for row in table.itertuples():
+            print(
+                f"{row.title} | {row.investment_amount:.2f}| {row.total_invested:.2f} | {row.size:.2f} | {row.average_price:.2f}"
+            )
+        profiler.finish(profile_output)
+        return
+
+    cerebro = bt.Cerebro()
 
-    data = bt.feeds.PandasData(dataname=data)  # pyright: ignore
+    data = ArrayData(dataname=df)  # pyright: ignore
     cerebro.adddata(data)
 
     cerebro.broker.setcash(2 * amount)
@@ -266,8 +252,11 @@ def main(symbol, interval, dayoffset, start_date, end_date, amount):
         investment_dayoffset=dayoffset,
     )
 
-    cerebro.run()
+    profiler.run(cerebro)
+    profiler.finish(profile_output)
 
 
 if __name__ == "__main__":
+    from commands.periodic_dca import main
+
     main()
@@ -1,11 +1,12 @@
 import pandas as pd
 import datetime
-import matplotlib.pyplot as plt
 
-import click
 import backtrader as bt
 
-from data import download
+from data import load
+from feeds.arrayfeed import ArrayData
+from profiling import Profiler
+from indicators.cached import CachedIndicators
 
 import warnings
 
@@ -54,26 +55,36 @@ class DCAStrategy(bt.Strategy):
                 self.count -= 1
 
 
-@click.command()
-@click.option("--symbol", default="BTC/USDT", help="交易对符号")
-@click.option(
-    "--interval",
-    default="1d",
-    type=click.Choice(["1h", "4h", "1d", "1w"]),
-    help="投资间隔",
-)
-@click.option("--start-date", default="2020-01-01", help="开始日期 (YYYY-MM-DD格式)")
-@click.option("--end-date", default="2024-12-31", help="结束日期 (YYYY-MM-DD格式)")
-@click.option("--plot", is_flag=True, help="是否绘图)")
-@click.option("--rsi-value", default=30.0, help="rsi 阈值)")
-def main(symbol, interval, start_date, end_date, plot, rsi_value):
+def run(
+    symbol,
+    interval,
+    base_interval,
+    start_date,
+    end_date,
+    plot,
+    rsi_value,
+    datafile,
+    no_indicator_cache,
+    profile,
+    cprofile,
+    profile_output,
+):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d")
     end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d")
 
     cerebro = bt.Cerebro()
 
-    data = download(symbol, interval=interval, start_date=start_date, end_date=end_date)
-    data = bt.feeds.PandasData(dataname=data)  # pyright: ignore
+    with profiler.phase("download"):
+        data = load(
+            symbol,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            datafile=datafile,
+            base_interval=base_interval,
+        )
+    data = ArrayData(dataname=data)  # pyright: ignore
     cerebro.adddata(data)
 
     cerebro.broker.setcash(30000)
@@ -89,18 +100,24 @@ def main(symbol, interval, start_date, end_date, plot, rsi_value):
     cerebro.addanalyzer(bt.analyzers.timereturn.TimeReturn, _name="timereturn")
 
     start_value = cerebro.broker.getvalue()
-    strat = cerebro.run()
+    with CachedIndicators(not no_indicator_cache):
+        strat = profiler.run(cerebro)
     end_value = cerebro.broker.getvalue()
 
     print(f"start:{start_value}, end:{end_value}, profit:{end_value - start_value}")
 
     if not plot:
+        profiler.finish(profile_output)
         return
 
+    # matplotlib 导入较慢，只在画图时导入
+    import matplotlib.pyplot as plt
+
     returns = strat[0].analyzers.getbyname("timereturn").get_analysis()
     returns_series = pd.Series(returns)
     net_value = (1 + returns_series).cumprod()
-    ax = net_value.plot(title="Returns", figsize=(12, 5))
+    with profiler.phase("plot"):
+        ax = net_value.plot(title="Returns", figsize=(12, 5))
 
     end_value = net_value.iloc[-1]
     end_index = net_value.index[-1]
@@ -114,8 +131,11 @@ def main(symbol, interval, start_date, end_date, plot, rsi_value):
         bbox=dict(facecolor="white", alpha=0.8),
     )
 
+    profiler.finish(profile_output)
     plt.show()
 
 
 if __name__ == "__main__":
+    from commands.rsi_tp_dca import main
+
     main()
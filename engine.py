@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+
+
+class VectorResult:
+    """
+    向量化回测结果
+
+    frame 为逐 bar 的 DataFrame，列为:
+      - size / price / commission: 当根 bar 开盘成交的数量、价格、手续费
+      - position / cash / value: 当根 bar 收盘后的持仓、现金（未计杠杆）和账户价值
+      - drawdown: 相对历史最高价值的回撤（百分比，与 bt.analyzers.DrawDown 一致）
+    """
+
+    def __init__(self, frame, cash):
+        self.frame = frame
+        self.start_value = cash
+
+    @property
+    def value(self):
+        return float(self.frame["value"].iloc[-1])
+
+    @property
+    def max_drawdown(self):
+        return float(self.frame["drawdown"].max())
+
+    @property
+    def orders(self):
+        return int(np.count_nonzero(self.frame["size"].to_numpy()))
+
+    @property
+    def commission(self):
+        return float(self.frame["commission"].sum())
+
+    @property
+    def position(self):
+        return float(self.frame["position"].iloc[-1])
+
+    def __repr__(self):
+        return (
+            f"VectorResult(value={self.value:.2f}, "
+            f"max_drawdown={self.max_drawdown:.2f}, orders={self.orders})"
+        )
+
+
+def column(data, name):
+    """按列名（不区分大小写，与 frame_arrays 一致）取 float64 数组，兼容 yfinance 的 Open/Close"""
+    columns = {c.lower(): c for c in data.columns if isinstance(c, str)}
+    return data[columns[name]].to_numpy(dtype=np.float64)
+
+
+def backtest(
+    data,
+    target_percent=None,
+    target_size=None,
+    order_size=None,
+    order_value=None,
+    cash=10000.0,
+    commission=0.0,
+    leverage=1.0,
+    slippage_perc=0.0,
+    slip_open=True,
+):
+    """
+    单标的向量化回测，成交规则对齐 backtrader 的 BackBroker 市价单:
+    第 t 根 bar 收盘时下单，第 t+1 根 bar 开盘成交，最后一根 bar 的订单不成交。
+
+    订单四选一，均为与 data 等长的数组，NaN 表示该 bar 不下单:
+      - target_percent: 等价于 order_target_size(broker.getvalue() / close * pct)
+      - target_size: 等价于 order_target_size(size)
+      - order_size: 等价于 buy(size) / sell(-size)
+      - order_value: 等价于 buy(size=value / close)
+
+    order_size/order_value 与账户价值无关，完全用数组运算完成；
+    target_* 依赖下单时的账户价值，只在有订单的 bar 上逐个计算，其余部分仍是数组运算。
+    commission/leverage 对应 setcommission，slippage_perc/slip_open 对应 set_slippage_perc。
+    """
+    orders = [
+        (name, arr)
+        for name, arr in (
+            ("target_percent", target_percent),
+            ("target_size", target_size),
+            ("order_size", order_size),
+            ("order_value", order_value),
+        )
+        if arr is not None
+    ]
+    if len(orders) != 1:
+        raise ValueError(
+            "exactly one of target_percent/target_size/order_size/order_value is required"
+        )
+    kind, arr = orders[0]
+
+    popen = column(data, "open")
+    phigh = column(data, "high")
+    plow = column(data, "low")
+    pclose = column(data, "close")
+    arr = np.asarray(arr, dtype=np.float64)
+    n = len(pclose)
+    if len(arr) != n:
+        raise ValueError(f"order array length {len(arr)} != data length {n}")
+
+    # 下一根 bar 的买入/卖出成交价（含滑点，滑点不超过当根最高/最低价）
+    slip = slippage_perc if slip_open else 0.0
+    buy_price = np.empty(n)
+    sell_price = np.empty(n)
+    buy_price[:-1] = np.minimum(popen[1:] * (1 + slip), phigh[1:])
+    sell_price[:-1] = np.maximum(popen[1:] * (1 - slip), plow[1:])
+    buy_price[-1] = sell_price[-1] = np.nan
+
+    if kind in ("order_size", "order_value"):
+        size = np.nan_to_num(arr)
+        if kind == "order_value":
+            size = size / pclose
+        size[-1] = 0.0
+        price = np.where(size > 0, buy_price, sell_price)
+        fill_size, fill_price = _shift(size), _shift(price)
+    else:
+        fill_size, fill_price = _fill_targets(
+            kind, arr, pclose, buy_price, sell_price, cash, commission, leverage
+        )
+
+    fill_comm = np.abs(fill_size) * fill_price * commission
+    position = np.cumsum(fill_size)
+    cash_curve = cash - np.cumsum(fill_size * fill_price + fill_comm)
+    value = cash_curve + position * pclose
+    peak = np.maximum.accumulate(value)
+    drawdown = 100.0 * (peak - value) / peak
+
+    frame = pd.DataFrame(
+        {
+            "size": fill_size,
+            "price": fill_price,
+            "commission": fill_comm,
+            "position": position,
+            "cash": cash_curve,
+            "value": value,
+            "drawdown": drawdown,
+        },
+        index=data.index,
+    )
+    return VectorResult(frame, cash)
+
+
+def _shift(arr):
+    shifted = np.zeros_like(arr)
+    shifted[1:] = np.nan_to_num(arr[:-1])
+    return shifted
+
+
+def _fill_targets(kind, arr, pclose, buy_price, sell_price, cash, commission, leverage):
+    n = len(pclose)
+    fill_size = np.zeros(n)
+    fill_price = np.zeros(n)
+
+    # cash 为不计杠杆的虚拟现金，账户价值 = cash + size * close；
+    # 多头占用的保证金只影响下单时的资金检查（与 BackBroker 的 Margin 拒单对应）
+    size = 0.0
+    avg_price = 0.0
+    margin_factor = 1.0 - 1.0 / leverage
+    for t in np.flatnonzero(~np.isnan(arr[:-1])):
+        close = pclose[t]
+        if kind == "target_percent":
+            target = (cash + size * close) / close * arr[t]
+        else:
+            target = arr[t]
+        delta = target - size
+        if delta == 0:
+            continue
+
+        # 按下单时的收盘价预执行: 先平仓部分，再检查开仓部分所需现金
+        closed = (
+            -size if target * size <= 0 else (delta if abs(target) < abs(size) else 0.0)
+        )
+        opened = delta - closed
+        pcash = cash - closed * close - abs(closed) * close * commission
+        psize = size + closed
+        if opened > 0:
+            pcash += max(psize, 0.0) * avg_price * margin_factor
+            pcash -= opened * close / leverage + opened * close * commission
+            if pcash < 0:
+                continue
+
+        price = buy_price[t] if delta > 0 else sell_price[t]
+        cash -= delta * price + abs(delta) * price * commission
+        if target == 0:
+            avg_price = 0.0
+        elif size * target <= 0:
+            avg_price = price
+        elif abs(target) > abs(size):
+            avg_price = (size * avg_price + delta * price) / target
+        size = target
+
+        fill_size[t + 1] = delta
+        fill_price[t + 1] = price
+
+    return fill_size, fill_price
+
+
+def sma(values, period):
+    return pd.Series(values).rolling(period).mean().to_numpy()
+
+
+def stddev(values, period):
+    """总体标准差，与 bt.ind.StandardDeviation 一致"""
+    return pd.Series(values).rolling(period).std(ddof=0).to_numpy()
+
+
+def _seeded_ewm(values, period, alpha):
+    # backtrader 的 EMA/SMMA 以前 period 个值的 SMA 作为初值
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    start = np.flatnonzero(~np.isnan(values))
+    if len(start) == 0 or len(values) - start[0] < period:
+        return out
+    first = start[0] + period - 1
+    seed = values[start[0] : first + 1].mean()
+    series = pd.Series(np.concatenate([[seed], values[first + 1 :]]))
+    out[first:] = series.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def ema(values, period):
+    return _seeded_ewm(values, period, 2.0 / (1 + period))
+
+
+def smma(values, period):
+    return _seeded_ewm(values, period, 1.0 / period)
+
+
+def rsi(values, period=14):
+    """与 bt.ind.RSI 一致（UpDay/DownDay 经 SMMA 平滑）"""
+    values = np.asarray(values, dtype=np.float64)
+    diff = np.full(len(values), np.nan)
+    diff[1:] = np.diff(values)
+    up = smma(np.where(np.isnan(diff), np.nan, np.maximum(diff, 0.0)), period)
+    down = smma(np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0.0)), period)
+    total = up + down
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total == 0, 50.0, 100.0 * up / total)
+
+
+def pct_change(values, period=1):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    out[period:] = values[period:] / values[:-period] - 1.0
+    return out
+
+
+def atr(high, low, close, period=14):
+    """与 bt.ind.ATR 一致（TrueRange 经 SMMA 平滑）"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = np.full(len(close), np.nan)
+    tr[1:] = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+    return smma(tr, period)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import array
+
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+COLUMNS = ("open", "high", "low", "close", "volume", "openinterest")
+
+
+def datenum(timestamps):
+    """
+    毫秒时间戳转为 backtrader 的日期数值，与 bt.date2num 逐位一致
+
+    date2num 用 math.fsum 对 ordinal 和时分秒各项求和，这里用双倍精度累加模拟同样的舍入
+    """
+    ms = np.asarray(timestamps, dtype=np.int64)
+    days, rem = np.divmod(ms, 86400000)
+    hours, rem = np.divmod(rem, 3600000)
+    minutes, rem = np.divmod(rem, 60000)
+    seconds, millis = np.divmod(rem, 1000)
+    terms = (
+        (days + 719163).astype(np.float64),
+        hours / 24.0,
+        minutes / 1440.0,
+        seconds / 86400.0,
+        (millis * 1000) / 86400e6,
+    )
+
+    hi = np.zeros(len(ms))
+    lo = np.zeros(len(ms))
+    for term in terms:
+        total = hi + term
+        back = total - hi
+        lo += (hi - (total - back)) + (term - back)
+        hi = total
+    return hi + lo
+
+
+def frame_arrays(df):
+    """从 DataFrame 取出毫秒时间戳和 OHLCV 列（列名不区分大小写），忽略 symbol 等其它列"""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    timestamps = index.as_unit("ms").asi8
+
+    columns = {c.lower(): c for c in df.columns if isinstance(c, str)}
+    values = {name: df[columns[name]].to_numpy() for name in COLUMNS if name in columns}
+    return timestamps, values
+
+
+class ArrayData(bt.feed.DataBase):
+    """
+    以 NumPy 数组为数据源的 feed
+
+    preload 时直接把整列写入 backtrader 的 line buffer（一次内存拷贝），
+    不逐行迭代 DataFrame，也不保留 symbol 之类的字符串列。
+
+    dataname 可以是 download() 返回的 DataFrame，或 (timestamps, {column: array})，
+    timestamps 为 UTC 毫秒时间戳。
+
+    Params:
+      - float32 (default False) : OHLCV 的 line buffer 使用 float32 存储，内存减半，
+        精度约 7 位有效数字；datetime 始终为 float64
+    """
+
+    params = (("float32", False),)
+
+    def start(self):
+        super(ArrayData, self).start()
+
+        timestamps, values = self._arrays()
+        self._dtnum = datenum(timestamps)
+        self._values = values
+        self._idx = -1
+        self._clipped = False
+
+    def _arrays(self):
+        if isinstance(self.p.dataname, pd.DataFrame):
+            return frame_arrays(self.p.dataname)
+        return self.p.dataname
+
+    def _clip(self):
+        # fromdate/todate 在 start() 之后才换算为日期数值
+        if self._clipped:
+            return
+        self._clipped = True
+
+        # K 线按时间排序，用切片截取，数据源为 memmap 时不会拷贝
+        lo = np.searchsorted(self._dtnum, self.fromdate, side="left")
+        hi = np.searchsorted(self._dtnum, self.todate, side="right")
+        if lo > 0 or hi < len(self._dtnum):
+            self._dtnum = self._dtnum[lo:hi]
+            self._values = {
+                name: values[lo:hi] for name, values in self._values.items()
+            }
+
+    def _load(self):
+        # 非 preload 模式（如 exactbars）逐根加载
+        self._clip()
+        self._idx += 1
+        if self._idx >= len(self._dtnum):
+            return False
+
+        self.lines.datetime[0] = self._dtnum[self._idx]
+        for name, values in self._values.items():
+            getattr(self.lines, name)[0] = values[self._idx]
+        return True
+
+    def preload(self):
+        if self._filters:
+            return super(ArrayData, self).preload()
+
+        self._clip()
+        n = len(self._dtnum)
+        for name in self.lines.getlinealiases():
+            line = getattr(self.lines, name)
+            if name == "datetime":
+                values, typecode = self._dtnum, "d"
+            elif name in self._values:
+                typecode = "f" if self.p.float32 else "d"
+                values = self._values[name]
+            else:
+                values, typecode = np.full(n, np.nan), "d"
+
+            dtype = np.float32 if typecode == "f" else np.float64
+            buf = array.array(typecode)
+            buf.frombytes(
+                memoryview(np.ascontiguousarray(values, dtype=dtype)).cast("B")
+            )
+            line.array = buf
+            line.lencount = n
+            line.idx = n - 1
+
+        self._idx = n - 1
+        self.home()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import math
+import time
+
+import backtrader as bt
+
+
+def bar_datenum(timestamp):
+    """毫秒时间戳转为 backtrader 的日期数值，与 bt.date2num 逐位一致（单根 K 线用）"""
+    days, rem = divmod(int(timestamp), 86400000)
+    hours, rem = divmod(rem, 3600000)
+    minutes, rem = divmod(rem, 60000)
+    seconds, millis = divmod(rem, 1000)
+    return math.fsum(
+        (
+            days + 719163,
+            hours / 24.0,
+            minutes / 1440.0,
+            seconds / 86400.0,
+            (millis * 1000) / 86400e6,
+        )
+    )
+
+
+class LiveData(bt.feed.DataBase):
+    """
+    逐根推送已收盘 K 线的实时 feed
+
+    dataname 为数据源，需要实现 poll(timeout)：返回 (timestamp, open, high, low, close, volume)，
+    timestamp 为 UTC 毫秒；timeout 秒内没有新 K 线返回 None；数据源结束返回 False。
+    数据源有 live 属性且为 True 时（追上最新 K 线）通知一次 LIVE 状态。
+
+    islive() 为 True，cerebro 不会 preload，按逐 bar 模式运行；
+    配合 Cerebro(exactbars=1)，line buffer 只保留指标需要的长度，长时间运行内存不增长。
+
+    每根 K 线取到的时间记录在 pushed_at（time.perf_counter()），供 Latency analyzer 使用。
+
+    Params:
+      - qcheck (default 1.0) : 没有新 K 线时每次等待的秒数
+    """
+
+    params = (("qcheck", 1.0),)
+
+    def islive(self):
+        return True
+
+    def start(self):
+        super(LiveData, self).start()
+        self.pushed_at = time.perf_counter()
+        self._live = False
+        self.put_notification(self.DELAYED)
+
+    def _load(self):
+        bar = self.p.dataname.poll(self._qcheck)
+        if not bar:
+            return bar
+
+        self.pushed_at = time.perf_counter()
+        timestamp, open_, high, low, close, volume = bar[:6]
+        self.lines.datetime[0] = bar_datenum(timestamp)
+        self.lines.open[0] = open_
+        self.lines.high[0] = high
+        self.lines.low[0] = low
+        self.lines.close[0] = close
+        self.lines.volume[0] = volume
+        self.lines.openinterest[0] = 0.0
+
+        if not self._live and getattr(self.p.dataname, "live", False):
+            self._live = True
+            self.put_notification(self.LIVE)
+        return True
@@ -0,0 +1,24 @@
+import numpy as np
+
+from barfile import bar_arrays, open_bars
+from feeds.arrayfeed import ArrayData
+
+
+class MemmapData(ArrayData):
+    """
+    从 barfile.write_bars() 写出的 K 线文件读取数据的 feed
+
+    文件以只读方式 np.memmap，各列都是映射上的视图：多个进程打开同一文件时共用页缓存，
+    启动时不需要解析 CSV/parquet 或 pickle DataFrame。
+
+    dataname 为文件路径，或 open_bars() 返回的数组。preload 时每个进程仍会把列拷进
+    backtrader 自己的 line buffer（可配合 float32 减半），内存随进程数增长；
+    不 preload 时（如 exactbars，见 sweep.worker_cerebro）逐根从映射读取，
+    进程内只多出一列 float64 的日期数值。
+    """
+
+    def _arrays(self):
+        bars = self.p.dataname
+        if not isinstance(bars, np.ndarray):
+            bars = open_bars(bars)
+        return bar_arrays(bars)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from feeds.arrayfeed import ArrayData
+
+
+class PanelData(ArrayData):
+    """
+    Panel 中一个标的的 feed
+
+    dataname 为 panel.Panel，symbol 为标的名。各列是 panel.values 上的视图，
+    所有标的的 feed 共用同一条时间轴，没有新 K 线的时刻是 Panel 补的 K 线，
+    backtrader 同步多个 data 时不需要为某个 data 停在上一根。
+
+    feed 从标的第一根 K 线开始，上市前的 NaN 不会交给 broker（持仓价值、下单都不会是 NaN），
+    与单独的 data 一样，所有标的都上市前策略调用 prenext。
+
+    Params:
+      - symbol (default None) : 标的名，为空时取 feed 的 name
+    """
+
+    params = (("symbol", None),)
+
+    def _arrays(self):
+        panel = self.p.dataname
+        s = panel.symbols.index(self.p.symbol or self.p.name)
+        first = int(panel.listed[:, s].argmax())
+        return panel.timestamps[first:], {
+            name: panel.values[first:, s, f] for f, name in enumerate(panel.fields)
+        }
+
+    def start(self):
+        super(PanelData, self).start()
+        self._preloaded = False
+
+    def preload(self):
+        super(PanelData, self).preload()
+        # preload 后 advance() 不逐根设置 tick_open 等，broker 取不到时使用 open[0] 等，成交价相同
+        self._tick_nullify()
+        self._preloaded = True
+
+    def advance_peek(self):
+        dt = self.lines.datetime
+        if dt.idx + 1 < len(dt.array):
+            return dt.array[dt.idx + 1]
+        return float("inf")
+
+    def advance(self, size=1, datamaster=None, ticks=True):
+        # cerebro 每根 K 线对每个 data 调用一次，标的多时是主要开销之一，
+        # preload 后只需移动各 line 的下标
+        if datamaster is not None or not self._preloaded:
+            return super(PanelData, self).advance(size, datamaster, ticks)
+        for line in self.lines.lines:
+            line.idx += size
+            line.lencount += size
+
+
+def add_panel(cerebro, panel, **kwargs):
+    """为 panel 中每个标的添加一个 PanelData（name 为标的名），返回添加的 feed 列表"""
+    datas = []
+    for symbol in panel.symbols:
+        data = PanelData(dataname=panel, symbol=symbol, name=symbol, **kwargs)
+        cerebro.adddata(data)
+        datas.append(data)
+    return datas
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import sys
+import array
+import hashlib
+import inspect
+
+import numpy as np
+import backtrader as bt
+
+from backtrader.indicator import MetaIndicator
+from backtrader.metabase import findowner
+
+from cache import IndicatorCache
+
+# 缓存格式或 key 的规则变化时递增，旧的缓存自然失效
+CACHE_VERSION = 1
+
+
+class Precomputed(bt.Indicator):
+    """
+    直接输出缓存中的 line，不做任何计算
+
+    由 precomputed_class() 按原指标生成子类，line 名称和参数与原指标相同，
+    策略中 self.rsi[0]、self.bbands.bot 等用法不需要改动
+    """
+
+    def __init__(self):
+        self._values = None
+
+    def _copy(self, start, end):
+        for line, values in zip(self.lines, self._values):
+            line.array[start:end] = array.array("d", values[start:end].tobytes())
+
+    def preonce(self, start, end):
+        self._copy(start, end)
+
+    def oncestart(self, start, end):
+        self._copy(start, end)
+
+    def once(self, start, end):
+        self._copy(start, end)
+
+    def prenext(self):
+        i = len(self) - 1
+        for line, values in zip(self.lines, self._values):
+            line[0] = values[i]
+
+    nextstart = next = prenext
+
+
+_classes = {}
+
+
+def precomputed_class(cls):
+    """与 cls 同名、同 line、同参数的 Precomputed 子类"""
+    if cls not in _classes:
+        _classes[cls] = type(Precomputed)(
+            cls.__name__,
+            (Precomputed,),
+            {
+                "__module__": __name__,
+                "lines": cls.lines.getlinealiases(),
+                "params": tuple(cls.params._getitems()),
+                "plotinfo": dict(cls.plotinfo._getitems()),
+            },
+        )
+    return _classes[cls]
+
+
+_sources = {}
+
+
+def class_digest(cls):
+    """
+    指标实现的指纹，指标代码修改后缓存自动失效
+
+    backtrader 自带的指标由版本号区分；其余指标取所在模块的源码，
+    以包含 once() 中调用的模块级函数（如 renko_bricks）
+    """
+    if cls not in _sources:
+        modules = {
+            c.__module__
+            for c in cls.__mro__
+            if c.__module__.split(".")[0] not in ("backtrader", "builtins")
+        }
+        digest = hashlib.sha1()
+        for name in sorted(modules):
+            try:
+                digest.update(inspect.getsource(sys.modules[name]).encode("utf-8"))
+            except (KeyError, OSError, TypeError):
+                digest.update(name.encode("utf-8"))
+        _sources[cls] = digest.hexdigest()
+    return _sources[cls]
+
+
+def _param_repr(value):
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return repr(value)
+
+
+class CachedIndicators:
+    """
+    持久化的指标结果缓存，在 with 块内运行 cerebro.run()
+
+    策略 __init__ 中直接创建的指标（指标内部的子指标随父指标一起缓存），
+    以 (指标类型及其代码、补全默认值后的参数、输入序列的指纹) 为 key:
+      - 命中时换成 Precomputed，直接输出缓存的 line，不创建子指标、不做计算
+      - 未命中时正常计算，run() 正常结束后把完整的 line 写入缓存
+
+    输入可以是数据（或数据的 line），也可以是同一个策略中已经走缓存的指标，
+    如 StandardDeviation(PercentChange(close))；其他输入（line 运算的结果等）不缓存。
+    只在数据 preload 时生效，否则创建指标时还拿不到完整的输入序列。
+
+    cache 为 IndicatorCache 实例；True 使用默认目录，False/None 时不做任何事
+    """
+
+    def __init__(self, cache=True):
+        if cache is True:
+            cache = IndicatorCache()
+        self.cache = cache or None
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints = {}
+        self._pending = {}
+        self._keep = []
+        self._original = None
+
+    def fingerprint(self, owner, source):
+        """输入的指纹，无法确定时返回 None"""
+        if not isinstance(source, bt.LineRoot):
+            return _param_repr(source)
+        fingerprint = self._fingerprints.get(id(source))
+        if fingerprint is None:
+            for data in owner.env.datas:
+                if source is data:
+                    fingerprint = self._data_fingerprint(data, data.lines)
+                elif any(source is line for line in data.lines):
+                    fingerprint = self._data_fingerprint(data, [source])
+                if fingerprint is not None:
+                    self._remember(source, fingerprint)
+                    break
+        return fingerprint
+
+    def _data_fingerprint(self, data, lines):
+        n = data.buflen()
+        digest = hashlib.sha1(str(n).encode("ascii"))
+        for line in lines:
+            digest.update(memoryview(line.array)[:n])
+        return digest.hexdigest()
+
+    def _remember(self, source, fingerprint):
+        # 记录时保留对象的引用，避免 id 被复用
+        self._fingerprints[id(source)] = fingerprint
+        self._keep.append(source)
+
+    def key(self, cls, owner, args, kwargs):
+        params = dict(cls.params._getitems())
+        params.update(kwargs)
+        inputs = [self.fingerprint(owner, x) for x in args or owner.datas]
+        if any(x is None for x in inputs):
+            return None
+        return "|".join(
+            [
+                f"v{CACHE_VERSION}",
+                bt.__version__,
+                f"{cls.__module__}.{cls.__qualname__}",
+                class_digest(cls),
+                ",".join(f"{k}={_param_repr(v)}" for k, v in sorted(params.items())),
+                *inputs,
+            ]
+        )
+
+    def create(self, cls, *args, **kwargs):
+        owner = findowner(None, bt.LineIterator)
+        if not isinstance(owner, bt.Strategy) or not owner.env._dopreload:
+            return self._original(cls, *args, **kwargs)
+
+        key = self.key(cls, owner, args, kwargs)
+        if key is None:
+            return self._original(cls, *args, **kwargs)
+
+        values, minperiod = self.cache.load(key)
+        if values is None:
+            self.misses += 1
+            indicator = self._original(cls, *args, **kwargs)
+            self._pending[key] = indicator
+        else:
+            self.hits += 1
+            indicator = self._original(precomputed_class(cls), *args, **kwargs)
+            indicator._values = values
+            indicator.updateminperiod(minperiod)
+
+        self._remember(indicator, key)
+        for i, line in enumerate(indicator.lines):
+            self._remember(line, f"{key}:{i}")
+        return indicator
+
+    def save(self):
+        for key, indicator in self._pending.items():
+            n = indicator.buflen()
+            # 没有跑完整段数据（提前中止等）时不写入
+            if not n or len(indicator) != n:
+                continue
+            lines = [
+                np.frombuffer(line.array, dtype=np.float64)[:n]
+                for line in indicator.lines
+            ]
+            self.cache.save(key, np.vstack(lines), indicator._minperiod)
+        self._pending.clear()
+
+    def __enter__(self):
+        if self.cache is None:
+            return self
+        cached = self
+        self._original = MetaIndicator.__call__
+
+        def create(cls, *args, **kwargs):
+            return cached.create(cls, *args, **kwargs)
+
+        MetaIndicator.__call__ = create
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self.cache is None:
+            return
+        MetaIndicator.__call__ = self._original
+        if exc_type is None:
+            self.save()
+        self._pending.clear()
+        self._fingerprints.clear()
+        self._keep.clear()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import array
+
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+from engine import atr as vector_atr
+
+
+def renko_bricks(close, atr):
+    """
+    一次遍历收盘价和 ATR，生成与 RenkoStrategy 相同的砖块序列
+
+    从第一根 ATR 有效的 K 线开始，以该收盘价为锚点：
+    收盘价偏离锚点超过 ATR 时按 change // atr 计算新增砖块数，并把锚点移到当前收盘价；
+    方向反转时累计砖块数重置，否则累加。
+
+    返回 dict，各项为与 close 等长的数组（ATR 无效的位置为 NaN）:
+      - count: 累计砖块数（正为上涨，负为下跌）
+      - bricks: 当根 K 线新增的砖块数
+      - direction: 当根 K 线新增砖块的方向 1/-1，没有新增为 0
+      - anchor: 当根 K 线结束后的锚点价格
+      - upper/lower: 下一根 K 线形成砖块的上下边界（anchor ± atr）
+    """
+    close = np.asarray(close, dtype=np.float64)
+    atr = np.asarray(atr, dtype=np.float64)
+    n = len(close)
+
+    count = np.full(n, np.nan)
+    bricks = np.full(n, np.nan)
+    anchor = np.full(n, np.nan)
+
+    valid = np.flatnonzero(~np.isnan(atr))
+    if len(valid):
+        start = valid[0]
+        # 用 Python float 逐个计算，比逐个访问 numpy 标量快得多
+        closes = close[start:].tolist()
+        atrs = atr[start:].tolist()
+        counts = [0.0] * len(closes)
+        news = [0.0] * len(closes)
+        anchors = [0.0] * len(closes)
+
+        previous_close = closes[0]
+        brick_count = 0.0
+        anchors[0] = previous_close
+        for i in range(1, len(closes)):
+            c = closes[i]
+            a = atrs[i]
+            change = c - previous_close
+            if change > a:
+                new = change // a
+                brick_count = new if brick_count < 0 else brick_count + new
+                news[i] = new
+                previous_close = c
+            elif change < -a:
+                new = change // a
+                brick_count = new if brick_count > 0 else brick_count + new
+                news[i] = new
+                previous_close = c
+            counts[i] = brick_count
+            anchors[i] = previous_close
+
+        count[start:] = counts
+        bricks[start:] = news
+        anchor[start:] = anchors
+
+    return {
+        "count": count,
+        "bricks": bricks,
+        "direction": np.sign(bricks),
+        "anchor": anchor,
+        "upper": anchor + atr,
+        "lower": anchor - atr,
+    }
+
+
+def renko_frame(df, period=14):
+    """对 OHLC DataFrame 计算 ATR 和砖块序列，返回同索引的 DataFrame"""
+    atr = vector_atr(df["high"], df["low"], df["close"], period=period)
+    return pd.DataFrame(
+        {"atr": atr, **renko_bricks(df["close"].to_numpy(), atr)}, index=df.index
+    )
+
+
+def renko_signals(count, break_count):
+    """累计砖块数达到 break_count 时为 1，达到 -break_count 时为 -1，否则为 0"""
+    count = np.nan_to_num(count)
+    return np.where(count >= break_count, 1, np.where(count <= -break_count, -1, 0))
+
+
+def signal_grid(df, periods, break_counts):
+    """
+    扫描 ATR period × break_count 网格，返回 {(period, break_count): signals}
+
+    砖块序列只与 ATR period 有关，每个 period 只计算一次
+    """
+    grid = {}
+    for period in periods:
+        count = renko_frame(df, period=period)["count"].to_numpy()
+        for break_count in break_counts:
+            grid[(period, break_count)] = renko_signals(count, break_count)
+    return grid
+
+
+class Renko(bt.Indicator):
+    """
+    Renko 砖块指标
+
+    runonce 模式下由 renko_bricks 一次性算出整段数据；逐 bar 模式下按相同规则增量计算。
+    ATR 也作为 line 输出：runonce 模式下子指标不会随策略推进，不能直接读取 self._atr[0]
+    """
+
+    lines = ("count", "bricks", "anchor", "atr")
+    params = (("period", 14),)
+
+    plotinfo = dict(subplot=True)
+
+    def __init__(self):
+        self._atr = bt.ind.ATR(self.data, period=self.p.period)
+        self.previous_close = None
+        self.brick_count = 0.0
+
+    def nextstart(self):
+        self.previous_close = self.data.close[0]
+        self.brick_count = 0.0
+        self.lines.count[0] = 0.0
+        self.lines.bricks[0] = 0.0
+        self.lines.anchor[0] = self.previous_close
+        self.lines.atr[0] = self._atr[0]
+
+    def next(self):
+        atr = self._atr[0]
+        change = self.data.close[0] - self.previous_close
+        new = 0.0
+        if change > atr:
+            new = change // atr
+            self.brick_count = new if self.brick_count < 0 else self.brick_count + new
+            self.previous_close = self.data.close[0]
+        elif change < -atr:
+            new = change // atr
+            self.brick_count = new if self.brick_count > 0 else self.brick_count + new
+            self.previous_close = self.data.close[0]
+
+        self.lines.count[0] = self.brick_count
+        self.lines.bricks[0] = new
+        self.lines.anchor[0] = self.previous_close
+        self.lines.atr[0] = atr
+
+    def once(self, start, end):
+        close = np.asarray(self.data.close.array[:end])
+        atr = np.asarray(self._atr.array[:end])
+        result = dict(renko_bricks(close, atr), atr=atr)
+        for name in self.lines.getlinealiases():
+            dst = getattr(self.lines, name).array
+            dst[start:end] = array.array("d", result[name][start:end])
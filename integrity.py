@@ -0,0 +1,120 @@
+import numpy as np
+
+from cache import merge_bars
+from resample import base_step
+
+
+def grid_slots(timestamps, interval):
+    """
+    已排序的毫秒时间戳在 interval 时间网格上的序号，返回 (序号, 是否正好在网格上)
+
+    固定长度的周期以第一根 K 线为网格起点（不假设交易所的对齐方式），月线按自然月
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if interval[-1] == "M":
+        months = ts.astype("datetime64[ms]").astype("datetime64[M]")
+        on_grid = months.astype("datetime64[ms]").astype(np.int64) == ts
+        return months.astype(np.int64) // int(interval[:-1]), on_grid
+
+    slots, rem = np.divmod(ts - ts[0], base_step(interval))
+    return slots, rem == 0
+
+
+def check_bars(timestamps, interval):
+    """
+    检查 K 线时间戳，返回报告 dict:
+      - bars: K 线数
+      - duplicates: 重复的时间戳个数
+      - out_of_order: 比前一根更早的 K 线个数
+      - off_grid: 不在时间网格上的 K 线个数
+      - gaps: 缺口列表 [(缺口前一根的时间戳, 缺口后一根的时间戳, 缺少的根数)]
+      - missing: 缺少的总根数
+
+    只检查第一根和最后一根之间，上市前和最新 K 线之后不算缺口
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    report = {
+        "bars": len(ts),
+        "duplicates": 0,
+        "out_of_order": 0,
+        "off_grid": 0,
+        "gaps": [],
+        "missing": 0,
+    }
+    if len(ts) < 2:
+        return report
+
+    diff = np.diff(ts)
+    report["out_of_order"] = int(np.count_nonzero(diff < 0))
+    if report["out_of_order"]:
+        ts = np.sort(ts)
+        diff = np.diff(ts)
+    unique = ts[np.concatenate([[True], diff != 0])]
+    report["duplicates"] = len(ts) - len(unique)
+
+    slots, on_grid = grid_slots(unique, interval)
+    report["off_grid"] = int(np.count_nonzero(~on_grid))
+
+    steps = np.diff(slots)
+    index = np.flatnonzero(steps > 1)
+    missing = steps[index] - 1
+    report["gaps"] = list(
+        zip(unique[index].tolist(), unique[index + 1].tolist(), missing.tolist())
+    )
+    report["missing"] = int(missing.sum())
+    return report
+
+
+def missing_ranges(gaps, span=0):
+    """
+    把缺口转为补下载的毫秒区间 [lo, hi]（闭区间，不含缺口两侧已有的 K 线）
+
+    相邻缺口合并后的跨度不超过 span 时合并为一个区间，一次请求补齐多个小缺口
+    """
+    ranges = []
+    for before, after, _ in gaps:
+        lo, hi = before + 1, after - 1
+        if ranges and hi - ranges[-1][0] <= span:
+            ranges[-1][1] = hi
+        else:
+            ranges.append([lo, hi])
+    return [tuple(r) for r in ranges]
+
+
+def repair_bars(ohlcvs, fetcher, interval, span=0):
+    """
+    整理 ccxt 格式的 K 线并补齐缺口，返回 ((n, 6) 数组, 报告)
+
+    按时间排序、时间戳重复时以后面的为准（见 merge_bars），然后只对缺口所在的区间
+    调用 fetcher(lo, hi) 重新下载，span 见 missing_ranges。
+    报告为整理前的 check_bars 结果，gaps/missing 为补下载后仍然缺少的（如交易所停机），
+    refetched 为补回的根数
+    """
+    raw = np.asarray(ohlcvs, dtype=np.float64).reshape(-1, 6)
+    report = check_bars(raw[:, 0], interval)
+    bars = merge_bars(raw)
+    report["refetched"] = 0
+    if not report["gaps"]:
+        return bars, report
+
+    fetched = [fetcher(lo, hi) for lo, hi in missing_ranges(report["gaps"], span)]
+    bars = merge_bars(bars, *fetched)
+
+    after = check_bars(bars[:, 0], interval)
+    report["refetched"] = report["missing"] - after["missing"]
+    report["gaps"], report["missing"] = after["gaps"], after["missing"]
+    return bars, report
+
+
+def format_report(report):
+    """一行文字描述报告，没有问题时返回 None"""
+    problems = [
+        f"{name} {report[name]}"
+        for name in ("duplicates", "out_of_order", "off_grid", "refetched")
+        if report.get(name)
+    ]
+    if report["missing"]:
+        problems.append(f"missing {report['missing']} ({len(report['gaps'])} gaps)")
+    if not problems:
+        return None
+    return f"{report['bars']} bars, " + ", ".join(problems)
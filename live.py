@@ -0,0 +1,244 @@
+import time
+import resource
+import collections
+
+import click
+import backtrader as bt
+
+from data import (
+    create_exchange,
+    interval_ms,
+    load,
+    load_markets,
+    ohlcv_limit,
+    rate_limiter,
+)
+from feeds.arrayfeed import frame_arrays
+from feeds.livefeed import LiveData
+from analyzers.latency import Latency
+from sweep import import_strategy, parse_value
+
+
+class ExchangePoller:
+    """
+    轮询交易所的 fetch_ohlcv，逐根返回已收盘的 K 线，供 LiveData 使用
+
+    启动时先补 warmup 根历史 K 线用于指标预热（分页请求，按最快速度推送），
+    之后在下一根 K 线收盘前不发请求，收盘后每隔 retry 秒请求一次直到交易所返回该 K 线。
+    网络错误只打印并在下次 poll 时重试，不中断策略。
+    """
+
+    def __init__(
+        self,
+        symbol,
+        interval="1h",
+        exchange_name="binance",
+        warmup=500,
+        retry=2.0,
+    ):
+        self.symbol = symbol
+        self.interval = interval
+        self.exchange = create_exchange(exchange_name)
+        load_markets(exchange_name)
+        self.limiter = rate_limiter(exchange_name)
+        self.limit = ohlcv_limit(self.exchange, symbol)
+        self.step = interval_ms(interval)
+        self.retry = retry
+        # last 为已推送的最后一根 K 线的开盘时间
+        now = int(time.time() * 1e3)
+        self.last = (now // self.step - warmup - 1) * self.step
+        self.pending = collections.deque()
+        self.live = False
+
+    def poll(self, timeout):
+        if not self.pending:
+            now = int(time.time() * 1e3)
+            # 下一根 K 线（开盘时间 last + step）在 last + 2 * step 收盘
+            wait = (self.last + 2 * self.step - now) / 1e3
+            if wait > 0:
+                time.sleep(min(timeout, wait))
+                return None
+            import ccxt
+
+            try:
+                self.fetch(now)
+            except ccxt.NetworkError as e:
+                click.echo(f"fetch_ohlcv 失败: {e}", err=True)
+            if not self.pending:
+                time.sleep(min(timeout, self.retry))
+                return None
+        return self.pending.popleft()
+
+    def fetch(self, now):
+        self.limiter.wait()
+        ohlcvs = self.exchange.fetch_ohlcv(
+            symbol=self.symbol,
+            since=self.last + self.step,
+            timeframe=self.interval,
+            limit=self.limit,
+        )
+        for ohlcv in ohlcvs:
+            # 交易所会返回尚未收盘的当前 K 线，跳过
+            if ohlcv[0] > self.last and ohlcv[0] + self.step <= now:
+                self.pending.append(tuple(ohlcv[:6]))
+                self.last = ohlcv[0]
+        self.live = self.last + 2 * self.step > now
+
+
+class ReplaySource:
+    """
+    按最快速度逐根推送录制好的 K 线（data.load 返回的 DataFrame），代替交易所用于测试延迟
+
+    每次只把 chunk 根 K 线转为 Python 元组，回放很长的文件时内存不随 K 线数增长
+    """
+
+    live = False
+
+    def __init__(self, df, chunk=4096):
+        timestamps, values = frame_arrays(df)
+        self.columns = [timestamps] + [
+            values[name] for name in ("open", "high", "low", "close", "volume")
+        ]
+        self.chunk = chunk
+        self.bars = self._bars()
+
+    def _bars(self):
+        for lo in range(0, len(self.columns[0]), self.chunk):
+            yield from zip(*(c[lo : lo + self.chunk].tolist() for c in self.columns))
+
+    def poll(self, timeout):
+        return next(self.bars, False)
+
+
+class PruneHistory(bt.Analyzer):
+    """
+    每隔 every 根 K 线丢弃已结束的订单和已平仓的交易
+
+    broker 和策略默认保留全部历史订单（含每次状态变化的副本）、交易和 bracket 子订单队列，
+    长时间运行时内存随成交次数增长；实时模式下不需要这些历史
+    """
+
+    params = (("every", 1000),)
+
+    def next(self):
+        if len(self.strategy) % self.p.every:
+            return
+        broker = self.strategy.broker
+        broker.orders = [order for order in broker.orders if order.alive()]
+        # BackBroker 为每个订单建一个 bracket 子订单队列，用完不删除
+        for ref in [ref for ref, children in broker._pchildren.items() if not children]:
+            del broker._pchildren[ref]
+        # 策略保存的是通知时的订单快照，只用于事后统计，全部丢弃
+        self.strategy._orders.clear()
+        for trades in self.strategy._trades.values():
+            for tradeid, history in trades.items():
+                # 最后一笔为当前（或下一笔）交易，保留
+                trades[tradeid] = history[-1:]
+
+
+class BarLog(bt.Analyzer):
+    """实时模式下每根 K 线打印一行：时间、收盘价、持仓、账户价值"""
+
+    def next(self):
+        click.echo(
+            f"{self.data.datetime.datetime(0):%Y-%m-%d %H:%M} "
+            f"close {self.data.close[0]:.2f} "
+            f"position {self.strategy.position.size:.6f} "
+            f"value {self.strategy.broker.getvalue():.2f}"
+        )
+
+
+def run_live(
+    source,
+    strategy,
+    params=None,
+    cash=1e8,
+    commission=0.0005,
+    leverage=1.0,
+    exactbars=1,
+    log=False,
+):
+    """
+    用 LiveData 驱动 strategy 逐根运行，返回 (策略实例, 延迟统计)
+
+    exactbars 传给 Cerebro，默认 1：line buffer 只保留需要的长度；
+    配合 PruneHistory，内存不随 K 线数和成交次数增长
+    """
+    cerebro = bt.Cerebro(stdstats=False, exactbars=exactbars)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission, leverage=leverage)
+    cerebro.adddata(LiveData(dataname=source))
+    cerebro.addstrategy(strategy, **(params or {}))
+    cerebro.addanalyzer(Latency, _name="latency")
+    cerebro.addanalyzer(PruneHistory)
+    if log:
+        cerebro.addanalyzer(BarLog)
+
+    strat = cerebro.run()[0]
+    return strat, strat.analyzers.latency.get_analysis()
+
+
+def run(
+    strategy,
+    params,
+    symbol,
+    interval,
+    exchange_name,
+    warmup,
+    replay,
+    start_date,
+    end_date,
+    cash,
+    commission,
+    leverage,
+    exactbars,
+):
+    kwargs = {}
+    for param in params:
+        name, value = param.split("=", 1)
+        kwargs[name] = parse_value(value)
+
+    if replay:
+        df = load(
+            symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            datafile=replay,
+        )
+        source = ReplaySource(df)
+    else:
+        source = ExchangePoller(
+            symbol, interval=interval, exchange_name=exchange_name, warmup=warmup
+        )
+
+    start = time.perf_counter()
+    strat, latency = run_live(
+        source,
+        import_strategy(strategy),
+        kwargs,
+        cash=cash,
+        commission=commission,
+        leverage=leverage,
+        exactbars=exactbars,
+        log=not replay,
+    )
+    seconds = time.perf_counter() - start
+
+    click.echo(f"组合价值: {strat.broker.getvalue()}")
+    if latency["bars"]:
+        click.echo(
+            f"bars {latency['bars']}  {latency['bars'] / seconds:,.0f} bars/s  "
+            f"延迟(us) mean {latency['mean']:.1f}  p50 {latency['p50']:.1f}  "
+            f"p99 {latency['p99']:.1f}  max {latency['max']:.1f}"
+        )
+    # ru_maxrss 在 Linux 上单位为 KB
+    click.echo(
+        f"峰值内存: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    from commands.live import main
+
+    main()
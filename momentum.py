@@ -1,42 +1,125 @@
+import click
+import numpy as np
 import backtrader as bt
-import backtrader.indicators as btind
-import yfinance as yf
 
-from data import download
+from data import download_many
+from feeds.arrayfeed import datenum
+from feeds.panelfeed import PanelData, add_panel
+from panel import panel_from_frames
+from profiling import Profiler
+from report import render_report
+from rebalance import Rebalancer
+from integrity import format_report
+from analyzers.value_curve import ValueCurve
 import warnings
 
 warnings.filterwarnings("ignore")
 
 
+def aligned_returns(datas):
+    """
+    各 data 按自身 K 线计算一期收益率，再按时间对齐成 (bars × symbols) 的数组，需要 preload
+
+    某个时间点没有新 K 线的 data 沿用上一根的收益率（与 backtrader 同步多 data 的方式一致），
+    尚未有 K 线的位置为 NaN
+    """
+    dts = [np.asarray(data.datetime.array) for data in datas]
+    times = np.unique(np.concatenate(dts))
+
+    returns = np.full((len(times), len(datas)), np.nan)
+    for i, (dt, data) in enumerate(zip(dts, datas)):
+        close = np.asarray(data.close.array)
+        pchg = np.full(len(close), np.nan)
+        pchg[1:] = close[1:] / close[:-1] - 1.0
+
+        pos = np.searchsorted(dt, times, side="right") - 1
+        valid = pos >= 0
+        returns[valid, i] = pchg[pos[valid]]
+
+    return times, returns
+
+
+def momentum_weights(returns, cut_pos):
+    """
+    按收益率横截面排序，最差的 cut_pos 个做空、最好的 cut_pos 个做多，等权
+
+    只要有一个标的收益率为 NaN，该行权重全部为 NaN（不调仓）
+    """
+    count = returns.shape[1]
+    weights = np.zeros_like(returns)
+
+    ranks = np.argpartition(
+        np.nan_to_num(returns), [cut_pos - 1, count - cut_pos], axis=1
+    )
+    rows = np.arange(len(returns))[:, None]
+    weights[rows, ranks[:, :cut_pos]] = -1.0 / count
+    weights[rows, ranks[:, count - cut_pos :]] = 1.0 / count
+
+    weights[np.isnan(returns).any(axis=1)] = np.nan
+    return weights
+
+
 class MomentumStrategy(bt.Strategy):
-    def __init__(self):
-        self.pchgs = {}
-        for data in self.datas:
-            self.pchgs[data] = btind.PercentChange(data, period=1)
+    """
+    横截面动量：上一期收益率最好的一半做多、最差的一半做空，等权
+
+    band 为 None 时只调整目标权重变化的标的；否则每根 K 线按全部目标权重调仓（纠正价格漂移），
+    偏离不超过 band（占账户价值的比例）或 min_notional 的标的不下单，见 Rebalancer
 
+    依赖 preload：start() 时用全部 K 线一次性算出目标权重，不 preload（如 exactbars）时报错
+    """
+
+    # 见 sweep.check_low_memory
+    requires_preload = True
+
+    params = (
+        ("band", None),
+        ("min_notional", 0.0),
+    )
+
+    def __init__(self):
         self.count = len(self.datas)
         self.cut_pos = int(self.count / 2)
 
+    def start(self):
+        # 依赖 preload，此时所有 data 的 K 线都已加载，一次性算出全部目标权重
+        if not self.env._dopreload:
+            raise ValueError("MomentumStrategy requires preload=True")
+        if all(isinstance(data, PanelData) for data in self.datas):
+            # 各 data 已经对齐，直接用 Panel 计算
+            panel = self.data.p.dataname
+            times, returns = datenum(panel.timestamps), panel.returns()
+        else:
+            times, returns = aligned_returns(self.datas)
+        self.rows = dict(zip(times.tolist(), range(len(times))))
+        self.weights = momentum_weights(returns, self.cut_pos)
+        self.last_weights = np.full(self.count, np.nan)
+        self.rebalancer = Rebalancer(
+            self, band=self.p.band or 0.0, min_notional=self.p.min_notional
+        )
+
     def notify_order(self, order: bt.Order):
         if order.status == bt.Order.Margin:
             print("Order is Margin")
 
     def next(self):
-        sorted_datas = sorted(
-            self.pchgs.keys(),
-            key=lambda k: self.pchgs[k][0],
-        )
+        weights = self.weights[self.rows[self.datetime[0]]]
+        if np.isnan(weights).any():
+            return
 
-        total_value = self.broker.getvalue()
-        target_value = total_value / self.count
-        for data in sorted_datas[: self.cut_pos]:
-            self.order_target_value(data, -target_value)
+        if self.p.band is None:
+            changed = weights != self.last_weights
+            if not changed.any():
+                return
+            self.rebalancer(np.where(changed, weights, np.nan))
+        else:
+            self.rebalancer(weights)
 
-        for data in sorted_datas[-self.cut_pos :]:
-            self.order_target_value(data, target_value)
+        self.last_weights = weights
 
 
-if __name__ == "__main__":
+def run(report, plot, band, min_notional, profile, cprofile, profile_output):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     cerebro = bt.Cerebro(stdstats=False)
     cerebro.addobserver(bt.observers.Broker)
 
@@ -74,10 +157,15 @@ if __name__ == "__main__":
     if len(symbols) % 2 != 0:
         raise ValueError(f"标的个数是{len(symbols)}, 无法被2整除")
 
-    for symbol in symbols:
-        df = download(
-            symbol, start_date="2020-01-01", end_date="2025-11-30", interval="1w"
+    with profiler.phase("download"):
+        dfs = download_many(
+            symbols, start_date="2020-01-01", end_date="2025-11-30", interval="1w"
         )
+    for symbol, df in dfs.items():
+        # 缺少 K 线的标的会沿用上一根的收益率参与排序，提示出来
+        integrity = format_report(df.attrs["integrity"])
+        if integrity:
+            click.echo(f"{symbol} 数据检查: {integrity}", err=True)
         # df = yf.download(
         #     symbol,
         #     start="2021-01-01",
@@ -86,20 +174,33 @@ if __name__ == "__main__":
         #     multi_level_index=False,
         # )
 
-        data = bt.feeds.PandasData(
-            dataname=df,
-            name=symbol,
-        )
+    # 所有标的对齐到同一时间轴，每个标的一个 PanelData
+    panel = panel_from_frames(dfs)
+    for data in add_panel(cerebro, panel):
         data.plotinfo.plot = False
-        cerebro.adddata(data)
 
-    cerebro.addstrategy(MomentumStrategy)
+    cerebro.addstrategy(MomentumStrategy, band=band, min_notional=min_notional)
 
     print(f"初始持仓价值：{cerebro.broker.getvalue()}")
-    strats = cerebro.run()
+    cerebro.addanalyzer(ValueCurve, _name="value")
+    strats = profiler.run(cerebro)
     print(f"最终持仓价值：{cerebro.broker.getvalue()}")
     max_drawdown = (
         strats[0].analyzers.getbyname("drawdown").get_analysis()["max"]["drawdown"]
     )
     print(f"最大回撤：{max_drawdown}")
-    cerebro.plot()
+    rebalancer = strats[0].rebalancer
+    print(f"订单数：{rebalancer.submitted}，跳过：{rebalancer.skipped}")
+    with profiler.phase("plot"):
+        # 多标的组合只画资金曲线
+        render_report(strats[0], report, data=None)
+        click.echo(f"报告已保存到: {report}")
+        if plot:
+            cerebro.plot()
+    profiler.finish(profile_output)
+
+
+if __name__ == "__main__":
+    from commands.momentum import main
+
+    main()
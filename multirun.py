@@ -0,0 +1,298 @@
+import datetime
+import contextlib
+
+import click
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+from backtrader.indicator import MetaIndicator
+from backtrader.metabase import findowner
+
+from data import load
+from feeds.arrayfeed import ArrayData
+from analyzers.value_curve import ValueCurve
+from indicators.cached import CachedIndicators
+from sweep import import_strategy, parse_value
+
+# 名称: (策略, 参数)，参数名为各 DCAStrategy.params，取值与各脚本 run() 的默认值一致；
+# periodic_dca 的 run() 按 --amount 60000 摊到 2020-2024 的 60 个月，每月 1 号投 1000
+DCA_CONFIGS = {
+    "periodic_dca": (
+        "dca.periodic_dca:DCAStrategy",
+        {
+            "investment_interval": "1m",
+            "investment_dayoffset": 1,
+            "investment_amount": 1000,
+        },
+    ),
+    "rsi_dca": ("dca.rsi_dca:DCAStrategy", {"investment_amount": 1000}),
+    "rsi_tp_dca": ("dca.rsi_tp_dca:DCAStrategy", {"investment_amount": 1000}),
+    "bbands_dca": ("dca.bbands_dca:DCAStrategy", {"investment_amount": 1000}),
+    "ema_dca": ("dca.ema_dca:DCAStrategy", {"investment_amount": 1000}),
+}
+
+
+class MultiBroker(bt.BrokerBase):
+    """
+    每个策略一个独立的 BackBroker，cerebro 通过它统一驱动
+
+    策略的 self.broker 指向自己的子 broker，下单、持仓、账户价值和 analyzer 都只看自己的账户；
+    cerebro 每根 bar 调用 next() 时依次撮合各子 broker，并汇总它们的订单通知
+    """
+
+    def __init__(self):
+        super(MultiBroker, self).__init__()
+        self.brokers = []
+
+    def add(self, cash=1e8, commission=0.0005, leverage=1.0):
+        broker = bt.brokers.BackBroker()
+        broker.setcash(cash)
+        broker.setcommission(commission, leverage=leverage)
+        self.brokers.append(broker)
+        return broker
+
+    def start(self):
+        super(MultiBroker, self).start()
+        for broker in self.brokers:
+            broker.cerebro = self.cerebro
+            broker.start()
+
+    def stop(self):
+        for broker in self.brokers:
+            broker.stop()
+
+    def next(self):
+        for broker in self.brokers:
+            broker.next()
+
+    def get_notification(self):
+        for broker in self.brokers:
+            order = broker.get_notification()
+            if order is not None:
+                return order
+        return None
+
+    def getcash(self):
+        return sum(broker.getcash() for broker in self.brokers)
+
+    def getvalue(self, datas=None):
+        return sum(broker.getvalue(datas) for broker in self.brokers)
+
+    def buy(self, owner, *args, **kwargs):
+        return owner.broker.buy(owner, *args, **kwargs)
+
+    def sell(self, owner, *args, **kwargs):
+        return owner.broker.sell(owner, *args, **kwargs)
+
+    def cancel(self, order):
+        return order.owner.broker.cancel(order)
+
+
+class SharedIndicators:
+    """
+    在策略 __init__ 中直接创建的指标，类型、输入和参数都相同时只创建一次
+
+    后创建的策略拿到的是先创建的策略的指标实例，指标只由先创建的策略计算和推进；
+    cerebro 按添加顺序逐根 bar 调用各策略，轮到后面的策略时指标已经是当前 bar 的值。
+    共享的指标不在后面策略的指标列表里，它们的 minperiod 由 _periodset() 另外计入。
+
+    指标内部创建的子指标不共享，只在 with 块内生效。
+    """
+
+    def __init__(self):
+        self.instances = {}
+        self.borrowed = {}
+        self.hits = 0
+        self._original = None
+
+    def key(self, cls, owner, args, kwargs):
+        # 参数取默认值补全，RSI(close) 与 RSI(close, period=14) 视为相同
+        params = dict(cls.params._getitems())
+        params.update(kwargs)
+        inputs = args or owner.datas
+        return (
+            cls,
+            tuple(id(x) if isinstance(x, bt.LineRoot) else x for x in inputs),
+            tuple(sorted(params.items())),
+        )
+
+    def create(self, cls, *args, **kwargs):
+        owner = findowner(None, bt.LineIterator)
+        if not isinstance(owner, bt.Strategy):
+            return self._original(cls, *args, **kwargs)
+
+        key = self.key(cls, owner, args, kwargs)
+        try:
+            indicator = self.instances.get(key)
+        except TypeError:  # 参数不可 hash
+            return self._original(cls, *args, **kwargs)
+
+        if indicator is None:
+            indicator = self.instances[key] = self._original(cls, *args, **kwargs)
+        elif indicator._owner is not owner:
+            self.borrowed.setdefault(id(owner), []).append(indicator)
+            self.hits += 1
+        return indicator
+
+    def minperiods(self, strategy):
+        """strategy 借用的指标对各数据 minperiod 的要求"""
+        minperiods = list(strategy._minperiods)
+        for indicator in self.borrowed.get(id(strategy), []):
+            clock = indicator._clock
+            for i, data in enumerate(strategy.datas):
+                if clock is data or any(clock is line for line in data.lines):
+                    minperiods[i] = max(minperiods[i], indicator._minperiod)
+        return minperiods
+
+    def __enter__(self):
+        shared = self
+        self._original = MetaIndicator.__call__
+
+        def create(cls, *args, **kwargs):
+            return shared.create(cls, *args, **kwargs)
+
+        MetaIndicator.__call__ = create
+        return self
+
+    def __exit__(self, *exc):
+        MetaIndicator.__call__ = self._original
+
+
+def bind_strategy(strategy, broker, shared=None):
+    """返回 strategy 的子类，实例使用自己的 broker，并计入借用指标的 minperiod"""
+
+    def __init__(self, *args, **kwargs):
+        self.broker = broker
+        strategy.__init__(self, *args, **kwargs)
+
+    def _periodset(self):
+        strategy._periodset(self)
+        if shared is not None:
+            self._minperiods = shared.minperiods(self)
+            self._minperiod = max([self._minperiod] + self._minperiods)
+
+    return type(strategy)(
+        strategy.__name__,
+        (strategy,),
+        {
+            "__module__": strategy.__module__,
+            "__init__": __init__,
+            "_periodset": _periodset,
+        },
+    )
+
+
+def run_many(
+    df,
+    configs,
+    cash=1e8,
+    commission=0.0005,
+    leverage=1.0,
+    share_indicators=True,
+    indicator_cache=True,
+):
+    """
+    在一次数据遍历中回测多个策略配置
+
+    configs 为 [(名称, 策略类, 参数)]；K 线只加载一次，所有策略挂在同一个 Cerebro 上，
+    每个策略有独立的 broker（初始资金、手续费相同），参数相同的指标只计算一次；
+    indicator_cache 见 CachedIndicators，再次运行时直接使用缓存的指标结果。
+    返回 (对比表, 策略实例列表)
+    """
+    cerebro = bt.Cerebro(stdstats=False)
+    brokers = MultiBroker()
+    cerebro.setbroker(brokers)
+    cerebro.adddata(ArrayData(dataname=df))
+
+    shared = SharedIndicators() if share_indicators else None
+    for _, strategy, params in configs:
+        broker = brokers.add(cash=cash, commission=commission, leverage=leverage)
+        cerebro.addstrategy(bind_strategy(strategy, broker, shared), **params)
+    cerebro.addanalyzer(ValueCurve, _name="value")
+
+    with contextlib.ExitStack() as stack:
+        if shared:
+            stack.enter_context(shared)
+        stack.enter_context(CachedIndicators(indicator_cache))
+        strats = cerebro.run()
+
+    rows = [
+        dict(name=name, **summary(strat, cash))
+        for (name, _, _), strat in zip(configs, strats)
+    ]
+    table = pd.DataFrame(rows).set_index("name")
+    table.attrs["shared_indicators"] = shared.hits if shared else 0
+    return table, strats
+
+
+def summary(strategy, cash):
+    values = strategy.analyzers.value.get_analysis()
+    peak = np.maximum.accumulate(values)
+    size = strategy.position.size
+    invested = getattr(strategy, "total_invested", np.nan)
+    return {
+        "invested": invested,
+        "size": size,
+        "average_cost": invested / size if size else 0.0,
+        "final_value": strategy.broker.getvalue(),
+        "profit": strategy.broker.getvalue() - cash,
+        "max_drawdown": float((100.0 * (peak - values) / peak).max()),
+    }
+
+
+def parse_config(spec):
+    """NAME 或 NAME@k=v,k=v，NAME 为 DCA_CONFIGS 中的名称或形如 dca.rsi_dca:DCAStrategy 的路径"""
+    name, _, overrides = spec.partition("@")
+    if name in DCA_CONFIGS:
+        path, params = DCA_CONFIGS[name]
+    else:
+        path, params = name, {}
+    params = dict(params)
+    for item in filter(None, overrides.split(",")):
+        key, value = item.split("=", 1)
+        params[key] = parse_value(value)
+    label = spec if overrides else name
+    return label, import_strategy(path), params
+
+
+def run(
+    configs,
+    symbol,
+    interval,
+    base_interval,
+    start_date,
+    end_date,
+    datafile,
+    cash,
+    commission,
+    no_share,
+    no_indicator_cache,
+):
+    start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d")
+    end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+
+    df = load(
+        symbol,
+        interval=interval,
+        start_date=start_date,
+        end_date=end_date,
+        datafile=datafile,
+        base_interval=base_interval,
+    )
+    table, _ = run_many(
+        df,
+        [parse_config(spec) for spec in configs or DCA_CONFIGS],
+        cash=cash,
+        commission=commission,
+        share_indicators=not no_share,
+        indicator_cache=not no_indicator_cache,
+    )
+    click.echo(table.to_string(float_format=lambda x: f"{x:.2f}"))
+    click.echo(f"共享指标: {table.attrs['shared_indicators']}")
+
+
+if __name__ == "__main__":
+    from commands.multirun import main
+
+    main()
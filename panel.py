@@ -0,0 +1,121 @@
+import numpy as np
+
+from data import download_many
+from feeds.arrayfeed import frame_arrays
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class Panel:
+    """
+    多个标的对齐到同一 UTC 时间轴的 K 线，values 为 (时间 × 标的 × 字段) 的 float64 数组
+
+      - timestamps: 所有标的 K 线时间的并集（毫秒，升序）
+      - present[t, s]: 标的 s 在 t 时刻有 K 线
+      - listed[t, s]: t 在标的 s 第一根和最后一根 K 线之间（上市前、下架后为 False）
+
+    上市前的价格为 NaN；上市后没有 K 线的时刻（停牌、缺口、下架后）补一根开高低收都等于上一根收盘价、
+    成交量为 0 的 K 线，指标和持仓价值与 backtrader 同步多个 data 时没有新 K 线的 data 停在上一根一致。
+    不同的是补的 K 线时间照常前进，此前提交的市价单会按上一根收盘价成交，
+    而单独的 data 要等到该标的下一根 K 线才成交；需要避开时可用 present 过滤
+    """
+
+    def __init__(self, timestamps, symbols, values, present, fields=FIELDS):
+        self.timestamps = timestamps
+        self.symbols = list(symbols)
+        self.values = values
+        self.present = present
+        self.fields = tuple(fields)
+
+        rows = np.arange(len(timestamps))[:, None]
+        first = np.where(present, rows, len(timestamps)).min(axis=0)
+        last = np.where(present, rows, -1).max(axis=0)
+        self.listed = (rows >= first) & (rows <= last)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __repr__(self):
+        return f"Panel({len(self)} bars x {len(self.symbols)} symbols)"
+
+    def field(self, name):
+        """(时间 × 标的) 的视图，不拷贝"""
+        return self.values[:, :, self.fields.index(name)]
+
+    def started(self):
+        """t 在标的 s 第一根 K 线及之后（含下架后）"""
+        return self.listed.cumsum(axis=0) > 0
+
+    def returns(self, name="close"):
+        """
+        各标的按自身 K 线计算的一期收益率，没有新 K 线的时刻沿用上一根的收益率，上市前为 NaN
+
+        与 momentum.aligned_returns 对逐个 data 的计算结果一致：价格已经沿用上一根，
+        有 K 线的时刻除以上一行的价格即为除以该标的上一根 K 线
+        """
+        prices = self.field(name)
+        returns = np.full(prices.shape, np.nan)
+        returns[1:] = prices[1:] / prices[:-1] - 1.0
+        returns[~self.present] = np.nan
+        return _ffill(returns, self.started())
+
+
+def _ffill(values, mask):
+    """mask 为 True 但值缺失的位置沿用同一列上一个 mask 为 True 且有值的位置，其余位置不变"""
+    rows = np.arange(len(values))[:, None]
+    index = np.where(mask & ~np.isnan(values), rows, 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = np.take_along_axis(values, index, axis=0)
+    return np.where(mask & np.isnan(values), filled, values)
+
+
+def panel_from_frames(frames, fields=FIELDS):
+    """
+    {symbol: DataFrame}（download_many() 的返回值）对齐为 Panel
+
+    时间轴为所有标的 K 线时间的并集，每个标的的 K 线用 searchsorted 一次放到对应的行
+    """
+    symbols = list(frames)
+    arrays = [frame_arrays(frames[symbol]) for symbol in symbols]
+
+    timestamps = np.sort(
+        np.concatenate([ts for ts, _ in arrays]) if arrays else np.empty(0, np.int64)
+    )
+    timestamps = timestamps[
+        np.append(True, np.diff(timestamps) != 0)[: len(timestamps)]
+    ]
+
+    values = np.full((len(timestamps), len(symbols), len(fields)), np.nan)
+    present = np.zeros((len(timestamps), len(symbols)), dtype=bool)
+    for s, (ts, columns) in enumerate(arrays):
+        rows = np.searchsorted(timestamps, ts)
+        present[rows, s] = True
+        for f, name in enumerate(fields):
+            values[rows, s, f] = columns[name]
+
+    panel = Panel(timestamps, symbols, values, present, fields)
+    filled = panel.started() & ~present
+    close = _ffill(panel.field("close"), panel.started())
+    for f, name in enumerate(fields):
+        values[:, :, f][filled] = 0.0 if name == "volume" else close[filled]
+    return panel
+
+
+def load_panel(
+    symbols,
+    start_date=None,
+    end_date=None,
+    interval="1d",
+    exchange_name="binance",
+    base_interval=None,
+):
+    """并发下载（见 download_many）多个标的并对齐为 Panel"""
+    frames = download_many(
+        symbols,
+        start_date=start_date,
+        end_date=end_date,
+        interval=interval,
+        exchange_name=exchange_name,
+        base_interval=base_interval,
+    )
+    return panel_from_frames(frames)
@@ -0,0 +1,264 @@
+import json
+import time
+import pstats
+import cProfile
+import functools
+import contextlib
+
+from collections import defaultdict
+
+import click
+
+
+class PhaseTimer:
+    """
+    按阶段累计耗时
+
+    阶段可以嵌套，耗时只计入最内层的阶段（外层阶段的耗时不含内层），
+    所以各阶段之和等于最外层阶段的总耗时。
+
+    用法:
+        timer = PhaseTimer()
+        with timer:
+            timer.wrap(data, "preload", "preload")
+            with timer.phase("run"):
+                cerebro.run()
+        timer.times  # {"run": ..., "preload": ...}
+
+    wrap() 替换的方法在退出 with 时恢复
+    """
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._stack = []
+        self._patches = []
+
+    def _enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self):
+        name, start, inner = self._stack.pop()
+        total = time.perf_counter() - start
+        self.times[name] += total - inner
+        self.counts[name] += 1
+        if self._stack:
+            self._stack[-1][2] += total
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def wrap(self, owner, attr, name):
+        """
+        把 owner.attr（类或实例上的方法）的调用计入阶段 name
+
+        name 可以是函数，以方法的第一个参数（self）为参数返回阶段名，用于按类型细分
+        """
+        original = getattr(owner, attr)
+        enter, exit_ = self._enter, self._exit
+
+        # 每根 bar 都可能调用，不用 contextmanager 以减少计时本身的开销
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            enter(name(args[0]) if callable(name) else name)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                exit_()
+
+        had_own = attr in vars(owner)
+        self._patches.append((owner, attr, vars(owner).get(attr), had_own))
+        setattr(owner, attr, timed)
+
+    def restore(self):
+        while self._patches:
+            owner, attr, original, had_own = self._patches.pop()
+            if had_own:
+                setattr(owner, attr, original)
+            else:
+                delattr(owner, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.restore()
+
+
+def _indicator_phase(indicator):
+    return f"indicator:{type(indicator).__name__}"
+
+
+class Profiler(PhaseTimer):
+    """
+    Cerebro 运行的分阶段性能分析
+
+    instrument() 之后 run() 期间的耗时按以下阶段拆分（均不含内层阶段）:
+      - preload: 数据 preload
+      - indicator:<类名>: 各指标的 next/once
+      - strategy: 策略 next（含下单前后的策略逻辑）
+      - orders: broker 接收订单（buy/sell）
+      - broker: broker 撮合、撤单
+      - analyzers / observers
+      - cerebro: 以上之外的主循环开销
+    download、plot 等由调用方用 phase() 标记。
+
+    cprofile=True 时每个阶段各用一个 cProfile 采样，报告中列出各阶段耗时最多的函数。
+    enabled=False 时所有方法都是空操作，run() 直接调用 cerebro.run()，脚本不需要分支。
+    """
+
+    def __init__(self, enabled=True, cprofile=False, top=5):
+        super(Profiler, self).__init__()
+        self.enabled = enabled
+        self.cprofile = enabled and cprofile
+        self.top = top
+        self.profiles = {}
+        self.bars = 0
+        self.orders = 0
+
+    @classmethod
+    def from_options(cls, profile=False, cprofile=False, profile_output=None):
+        return cls(
+            enabled=bool(profile or cprofile or profile_output), cprofile=cprofile
+        )
+
+    def _enter(self, name):
+        if self.cprofile:
+            if self._stack:
+                self.profiles[self._stack[-1][0]].disable()
+            self.profiles.setdefault(name, cProfile.Profile()).enable()
+        super(Profiler, self)._enter(name)
+
+    def _exit(self):
+        name = self._stack[-1][0]
+        super(Profiler, self)._exit()
+        if self.cprofile:
+            self.profiles[name].disable()
+            if self._stack:
+                self.profiles[self._stack[-1][0]].enable()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        with super(Profiler, self).phase(name):
+            yield
+
+    def instrument(self, cerebro):
+        """给 cerebro 的数据、broker 以及指标/策略/analyzer/observer 的基类挂上计时"""
+        if not self.enabled:
+            return
+        # profile_options 在 cli.py 的各命令中使用，backtrader 只在用到时导入
+        import backtrader as bt
+
+        for data in cerebro.datas:
+            self.wrap(data, "preload", "preload")
+        broker = cerebro.getbroker()
+        for attr in ("buy", "sell"):
+            self.wrap(broker, attr, "orders")
+        for attr in ("next", "cancel"):
+            self.wrap(broker, attr, "broker")
+        for attr in ("_next", "_once"):
+            self.wrap(bt.Indicator, attr, _indicator_phase)
+        for attr in ("_next", "_oncepost"):
+            self.wrap(bt.Strategy, attr, "strategy")
+        self.wrap(bt.Strategy, "_next_analyzers", "analyzers")
+        self.wrap(bt.Strategy, "_next_observers", "observers")
+
+    def run(self, cerebro, **kwargs):
+        """instrument 并运行 cerebro，返回 cerebro.run() 的结果"""
+        if not self.enabled:
+            return cerebro.run(**kwargs)
+        self.instrument(cerebro)
+        try:
+            with self.phase("cerebro"):
+                strats = cerebro.run(**kwargs)
+        finally:
+            self.restore()
+        self.bars += max((len(data) for data in cerebro.datas), default=0)
+        self.orders += self.counts["orders"]
+        return strats
+
+    def report(self):
+        total = sum(self.times.values())
+        phases = [
+            {
+                "phase": name,
+                "seconds": seconds,
+                "percent": 100.0 * seconds / total if total else 0.0,
+                "calls": self.counts[name],
+            }
+            for name, seconds in sorted(
+                self.times.items(), key=lambda item: item[1], reverse=True
+            )
+        ]
+        if self.cprofile:
+            for phase in phases:
+                phase["top"] = self._top_functions(self.profiles[phase["phase"]])
+        return {
+            "seconds": total,
+            "bars": self.bars,
+            "orders": self.orders,
+            "phases": phases,
+        }
+
+    def _top_functions(self, profile):
+        stats = pstats.Stats(profile).sort_stats("tottime")
+        rows = []
+        # 计时本身的开销不列出
+        funcs = [func for func in stats.fcn_list if func[0] != __file__]
+        for func in funcs[: self.top]:
+            _, calls, tottime, cumtime, _ = stats.stats[func]
+            rows.append(
+                {
+                    "function": pstats.func_std_string(func),
+                    "calls": calls,
+                    "tottime": tottime,
+                    "cumtime": cumtime,
+                }
+            )
+        return rows
+
+    def format_report(self, report=None):
+        report = report or self.report()
+        lines = [
+            f"总耗时 {report['seconds']:.3f}s  bars {report['bars']}  "
+            f"orders {report['orders']}",
+        ]
+        for phase in report["phases"]:
+            lines.append(
+                f"  {phase['phase']:<36}{phase['seconds']:>9.3f}s"
+                f"{phase['percent']:>7.1f}%{phase['calls']:>10}"
+            )
+            for row in phase.get("top", []):
+                lines.append(
+                    f"      {row['tottime']:>8.3f}s {row['calls']:>9}  {row['function']}"
+                )
+        return "\n".join(lines)
+
+    def finish(self, output=None):
+        """打印报告；output 不为空时同时写入 JSON 文件"""
+        if not self.enabled:
+            return
+        report = self.report()
+        click.echo(self.format_report(report))
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+            click.echo(f"性能分析报告已保存到: {output}")
+
+
+def profile_options(func):
+    """给 click 命令加上 --profile/--cprofile/--profile-output 选项"""
+    func = click.option("--profile-output", help="性能分析报告写入 JSON 文件")(func)
+    func = click.option(
+        "--cprofile", is_flag=True, help="各阶段用 cProfile 采样，列出耗时最多的函数"
+    )(func)
+    func = click.option("--profile", is_flag=True, help="打印各阶段耗时")(func)
+    return func
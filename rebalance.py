@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class Rebalancer:
+    """
+    按目标权重向量一次性对策略的全部 data 调仓
+
+    weights[i] 为 strategy.datas[i] 的目标持仓价值占账户价值的比例，NaN 表示该标的不调仓。
+    与逐个调用 order_target_value(data, weight * value) 的成交数量一致，但:
+      - 持仓价值、调仓金额和下单数量用数组一次算出，不逐个调用 broker.getvalue(datas=[data])
+      - 调仓金额小于 band * 账户价值或 min_notional 的标的跳过（平仓不跳过），
+        避免权重小幅漂移时每根 K 线对每个标的都下单
+      - 先提交卖单再提交买单，卖出释放的现金可用于同一根 K 线的买入
+
+    在 strategy.start() 中创建（需要 broker 已设置好手续费），submitted/skipped 累计下单和跳过的次数
+    """
+
+    def __init__(self, strategy, band=0.0, min_notional=0.0):
+        self.strategy = strategy
+        self.band = band
+        self.min_notional = min_notional
+
+        broker = strategy.broker
+        self.comminfos = [broker.getcommissioninfo(data) for data in strategy.datas]
+        self.leverage = np.array([c.get_leverage() for c in self.comminfos])
+        # 股票类手续费且 shortcash（默认）时持仓价值为 size * price，可以整体用数组计算
+        self.vector = broker.p.shortcash and all(c._stocklike for c in self.comminfos)
+
+        self.submitted = 0
+        self.skipped = 0
+
+    def __call__(self, weights, value=None):
+        """按 weights 调仓，返回提交的订单列表；value 为计算目标价值用的账户价值，默认当前价值"""
+        strategy = self.strategy
+        broker = strategy.broker
+        datas = strategy.datas
+
+        weights = np.asarray(weights, dtype=np.float64)
+        if value is None:
+            value = broker.getvalue()
+
+        prices = np.array([data.close[0] for data in datas])
+        sizes = np.array([strategy.getposition(data).size for data in datas])
+        if self.vector:
+            current = sizes * prices
+        else:
+            current = np.array([broker.getvalue(datas=[data]) for data in datas])
+
+        target = weights * value
+        delta = target - current
+        closing = (target == 0) & (sizes != 0)
+        trade = ~np.isnan(weights) & ((delta != 0) | closing)
+
+        small = (
+            trade
+            & ~closing
+            & (np.abs(delta) < max(self.band * value, self.min_notional))
+        )
+        self.skipped += int(np.count_nonzero(small))
+        trade &= ~small
+
+        index = np.flatnonzero(trade)
+        if self.vector:
+            amounts = np.trunc(
+                self.leverage[index] * (np.abs(delta[index]) // prices[index])
+            )
+        else:
+            amounts = np.array(
+                [self.comminfos[i].getsize(prices[i], abs(delta[i])) for i in index],
+                dtype=np.float64,
+            )
+        amounts = np.where(closing[index], np.abs(sizes[index]), amounts)
+
+        # 平仓按持仓方向下单（期货类的持仓价值总为正，不能用调仓金额的符号判断）
+        buys = np.where(closing[index], sizes[index] < 0, delta[index] > 0).tolist()
+        amounts = amounts.tolist()
+
+        orders = []
+        # 卖单（调仓金额为负）在前
+        for k in np.argsort(delta[index], kind="stable").tolist():
+            if not amounts[k]:
+                continue
+            i = int(index[k])
+            submit = strategy.buy if buys[k] else strategy.sell
+            orders.append(
+                submit(data=datas[i], size=amounts[k], price=float(prices[i]))
+            )
+
+        self.submitted += len(orders)
+        return orders
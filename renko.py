@@ -1,42 +1,28 @@
 import click
-import pandas as pd
 import backtrader as bt
 
 
-from data import download
+from data import load
+from feeds.arrayfeed import ArrayData
+from indicators.renko import Renko
+from profiling import Profiler
+from indicators.cached import CachedIndicators
+from report import render_report
+from analyzers.value_curve import ValueCurve
 
 
 class RenkoStrategy(bt.Strategy):
     params = (("break_count", 3),)
 
     def __init__(self):
-        self.atr = bt.ind.ATR(self.data, period=14)
-        self.previous_close = None
+        self.renko = Renko(self.data, period=14)
+        self.atr = self.renko.atr
         self.brick_count = 0
 
         self.stop_order = None
 
     def next(self):
-        if self.previous_close is None:
-            self.previous_close = self.data.close[0]
-            return
-
-        change = self.data.close[0] - self.previous_close
-        if change > self.atr[0]:
-            brick_count = change // self.atr[0]
-            if self.brick_count < 0:
-                self.brick_count = brick_count
-            else:
-                self.brick_count += brick_count
-
-            self.previous_close = self.data.close[0]
-        elif change < -self.atr[0]:
-            brick_count = change // self.atr[0]
-            if self.brick_count > 0:
-                self.brick_count = brick_count
-            else:
-                self.brick_count += brick_count
-            self.previous_close = self.data.close[0]
+        self.brick_count = self.renko.count[0]
 
         if self.brick_count >= self.p.break_count:
             if self.stop_order:
@@ -67,14 +53,22 @@ class RenkoStrategy(bt.Strategy):
                 )
 
 
-@click.command()
-@click.option("--symbol", default="BTC/USDT")
-@click.option("--datafile")
-@click.option("--interval", default="1h")
-@click.option("--start-date", default="2020-01-01")
-@click.option("--end-date", default="2025-11-30")
-@click.option("--break-count", default=3)
-def main(symbol, datafile, interval, start_date, end_date, break_count):
+def run(
+    symbol,
+    datafile,
+    interval,
+    base_interval,
+    start_date,
+    end_date,
+    break_count,
+    report,
+    plot,
+    no_indicator_cache,
+    profile,
+    cprofile,
+    profile_output,
+):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     cerebro = bt.Cerebro(stdstats=False)
     cerebro.broker.setcash(1e8)
     cerebro.broker.setcommission(0.0005)
@@ -82,22 +76,34 @@ def main(symbol, datafile, interval, start_date, end_date, break_count):
     cerebro.addobserver(bt.observers.Value)
     cerebro.addobserver(bt.observers.BuySell)
 
-    if datafile:
-        df = pd.read_csv(datafile, parse_dates=["datetime"], index_col=[0])
-    else:
-        df = download(
-            symbol, start_date=start_date, end_date=end_date, interval=interval
+    with profiler.phase("download"):
+        df = load(
+            symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            datafile=datafile,
+            base_interval=base_interval,
         )
 
-    data = bt.feeds.PandasData(dataname=df)
+    data = ArrayData(dataname=df)
     data.plotinfo.plot = False
     cerebro.adddata(data)
 
     cerebro.addstrategy(RenkoStrategy, break_count=break_count)
-    cerebro.run()
+    cerebro.addanalyzer(ValueCurve, _name="value")
+    with CachedIndicators(not no_indicator_cache):
+        strats = profiler.run(cerebro)
 
-    cerebro.plot(style="candlestick")
+    with profiler.phase("plot"):
+        render_report(strats[0], report)
+        click.echo(f"报告已保存到: {report}")
+        if plot:
+            cerebro.plot(style="candlestick")
+    profiler.finish(profile_output)
 
 
 if __name__ == "__main__":
+    from commands.renko import main
+
     main()
@@ -0,0 +1,182 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from analyzers.value_curve import ValueCurve
+
+# backtrader 日期数值以 0001-01-01 为 1，matplotlib 以 1970-01-01 为 0
+MPL_EPOCH = 719163.0
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标
+
+    首尾两点固定保留，其余点均分为 threshold - 2 个桶，每个桶保留与前一个保留点、
+    下一个桶均值构成三角形面积最大的点，能保留曲线的形状和极值
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    edges = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    bounds = np.append(edges, n)
+
+    # 各桶的均值用前缀和一次算出
+    csx = np.concatenate([[0.0], np.cumsum(x)])
+    csy = np.concatenate([[0.0], np.cumsum(y)])
+    counts = bounds[1:] - bounds[:-1]
+    avg_x = (csx[bounds[1:]] - csx[bounds[:-1]]) / counts
+    avg_y = (csy[bounds[1:]] - csy[bounds[:-1]]) / counts
+
+    index = np.empty(threshold, dtype=np.int64)
+    index[0], index[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        index[i + 1] = a
+    return index
+
+
+def minmax_buckets(x, low, high, buckets):
+    """
+    每个桶（约一个像素宽）只保留最低价和最高价，返回 (桶起点 x, 桶内最低, 桶内最高)
+
+    画成上下包络时与逐根 K 线画出的效果在像素上一致
+    """
+    n = len(x)
+    if buckets >= n:
+        return x, low, high
+    starts = np.unique((np.arange(buckets) * n) // buckets)
+    return (
+        x[starts],
+        np.minimum.reduceat(low, starts),
+        np.maximum.reduceat(high, starts),
+    )
+
+
+def _value_curve(strategy):
+    for analyzer in strategy.analyzers:
+        if isinstance(analyzer, ValueCurve):
+            return analyzer
+    raise ValueError("render_report requires a ValueCurve analyzer on the strategy")
+
+
+def render_report(
+    strategy,
+    path,
+    data=0,
+    start=None,
+    end=None,
+    width=1600,
+    height=900,
+    dpi=100,
+    title=None,
+):
+    """
+    不依赖显示器，把回测结果画成 PNG（.png）或内嵌 SVG 的 HTML（.html）
+
+    strategy 需要添加 ValueCurve analyzer；data 为画价格的数据序号，None 时只画资金曲线。
+    start/end 为显示区间（datetime 或日期字符串，UTC），只画区间内的 K 线和买卖点。
+    价格按像素取最高/最低画包络、收盘价和资金曲线用 LTTB 降采样到约两倍像素宽，
+    画图耗时与 K 线数量基本无关
+    """
+    # matplotlib 导入较慢，只在画图时导入
+    from matplotlib import dates as mdates
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    curve = _value_curve(strategy)
+    points = 2 * width
+    title = title or type(strategy).__name__
+
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    if data is None:
+        value_ax = fig.add_subplot(1, 1, 1)
+        value_ax.set_title(title)
+    else:
+        price_ax, value_ax = fig.subplots(
+            2, 1, sharex=True, gridspec_kw={"height_ratios": [2, 1]}
+        )
+        price_ax.set_title(title)
+
+        # preload 模式下 line buffer 保存了全部 K 线
+        feed = strategy.datas[data]
+        x, (close, low, high) = _view(
+            feed.datetime.array,
+            [feed.close.array, feed.low.array, feed.high.array],
+            start,
+            end,
+        )
+        bx, blow, bhigh = minmax_buckets(x, low, high, width)
+        price_ax.fill_between(bx, blow, bhigh, color="0.8", linewidth=0, step="post")
+        keep = lttb(x, close, points)
+        price_ax.plot(x[keep], close[keep], color="0.2", linewidth=0.8)
+        _plot_fills(price_ax, curve.fills(), data, x, width)
+        price_ax.set_ylabel(feed._name or "price")
+
+    x, (values,) = _view(curve.datetimes(), [curve.get_analysis()], start, end)
+    keep = lttb(x, values, points)
+    value_ax.plot(x[keep], values[keep], color="tab:blue", linewidth=1.0)
+    value_ax.set_ylabel("value")
+
+    locator = mdates.AutoDateLocator()
+    value_ax.xaxis.set_major_locator(locator)
+    value_ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    fig.tight_layout()
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".html":
+        buf = io.StringIO()
+        fig.savefig(buf, format="svg")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+                f"<title>{title}</title></head>"
+                f"<body>{buf.getvalue()}</body></html>\n"
+            )
+    else:
+        fig.savefig(path)
+    return path
+
+
+def _view(dtnums, columns, start, end):
+    """转为 matplotlib 日期并截取 [start, end]"""
+    from matplotlib import dates as mdates
+
+    x = np.asarray(dtnums, dtype=np.float64) - MPL_EPOCH
+    lo, hi = 0, len(x)
+    if start is not None:
+        lo = int(np.searchsorted(x, mdates.date2num(pd.Timestamp(start)), side="left"))
+    if end is not None:
+        hi = int(np.searchsorted(x, mdates.date2num(pd.Timestamp(end)), side="right"))
+    return x[lo:hi], [np.asarray(c, dtype=np.float64)[lo:hi] for c in columns]
+
+
+def _plot_fills(ax, fills, data, x, width):
+    if not len(x):
+        return
+    fills = np.array(
+        [(dt - MPL_EPOCH, price, size) for dt, price, size, i in fills if i == data]
+    ).reshape(-1, 3)
+    # 只画显示区间内的买卖点，同一像素列内的同向成交只画一个
+    fills = fills[(fills[:, 0] >= x[0]) & (fills[:, 0] <= x[-1])]
+    span = max(x[-1] - x[0], 1e-9)
+    for side, marker, color in ((1, "^", "tab:green"), (-1, "v", "tab:red")):
+        points = fills[np.sign(fills[:, 2]) == side]
+        pixel = ((points[:, 0] - x[0]) / span * width).astype(np.int64)
+        _, first = np.unique(pixel, return_index=True)
+        points = points[first]
+        ax.scatter(
+            points[:, 0], points[:, 1], marker=marker, s=12, color=color, zorder=3
+        )
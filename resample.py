@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# ccxt 周期单位的秒数；M、y 为近似值（用于估算页数等），按周期切分 K 线时月线按自然月处理
+TIMEFRAME_SECONDS = {
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+    "w": 7 * 24 * 60 * 60,
+    "M": 30 * 24 * 60 * 60,
+    "y": 365 * 24 * 60 * 60,
+}
+
+# 周线从星期一 00:00 UTC 开始（与 Binance 一致），1970-01-05 为星期一
+WEEK_ORIGIN = 4 * 24 * 60 * 60 * 1000
+
+
+def interval_ms(interval):
+    unit = interval[-1]
+    if unit not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Not supported interval: {interval}")
+    return int(interval[:-1]) * TIMEFRAME_SECONDS[unit] * 1000
+
+
+def base_step(interval):
+    """
+    固定长度周期单根 K 线的毫秒数，用于按周期切分和作为聚合的基础周期；
+    月线（M）、年线（y）长度不固定，直接报错
+    """
+    if interval[-1] in ("M", "y"):
+        raise ValueError(
+            f"Interval {interval} has no fixed length, use s/m/h/d/w "
+            "(as base interval, e.g. 1d for 1M)"
+        )
+    return interval_ms(interval)
+
+
+def bucket_starts(timestamps, interval):
+    """
+    每个毫秒时间戳所在 interval 周期的开始时间（UTC 毫秒）
+
+    分钟/小时/日线从 1970-01-01 00:00 UTC 起按整周期对齐，周线从星期一起对齐
+    （2w 从 1970-01-05 起每两周一根），月线为自然月（nM 从 1970-01 起每 n 个月一根）
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    count = int(interval[:-1])
+    if interval[-1] == "M":
+        months = ts.astype("datetime64[ms]").astype("datetime64[M]").astype(np.int64)
+        months = months // count * count
+        return months.astype("datetime64[M]").astype("datetime64[ms]").astype(np.int64)
+
+    step = base_step(interval)
+    origin = WEEK_ORIGIN if interval[-1] == "w" else 0
+    return (ts - origin) // step * step + origin
+
+
+def bucket_ends(starts, interval):
+    """周期的结束时间（下一周期的开始时间）"""
+    if interval[-1] == "M":
+        months = np.asarray(starts, dtype="datetime64[ms]").astype("datetime64[M]")
+        months += int(interval[:-1])
+        return months.astype("datetime64[ms]").astype(np.int64)
+    return np.asarray(starts, dtype=np.int64) + base_step(interval)
+
+
+def resample(df, interval, base_interval=None):
+    """
+    把 download() 返回的 K 线聚合为更大的 interval，返回结构相同的 DataFrame
+
+    open 取周期内第一根、close 取最后一根、high/low 取最值、volume 求和，
+    按周期边界一次切分后用 reduceat 计算，不逐组调用 groupby。
+    只保留完整的周期：开头的周期要求第一根 K 线正好在周期开始（与按 since 下载一致），
+    结尾的周期要求最后一根 K 线覆盖到周期结束（未收盘的周期不输出）。
+    base_interval 为 df 的周期，为空时取相邻 K 线间隔的中位数。
+    """
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    ts = index.as_unit("ms").asi8
+    if len(ts) == 0:
+        return df.iloc[:0]
+
+    if base_interval:
+        step = base_step(base_interval)
+    else:
+        step = int(np.median(np.diff(ts))) if len(ts) > 1 else 0
+
+    starts = bucket_starts(ts, interval)
+    edges = np.flatnonzero(np.diff(starts)) + 1
+    first = np.concatenate([[0], edges])
+    last = np.append(edges - 1, len(ts) - 1)
+
+    buckets = starts[first]
+    complete = (buckets >= ts[0]) & (bucket_ends(buckets, interval) <= ts[-1] + step)
+
+    def column(name):
+        return df[name].to_numpy(dtype=np.float64)
+
+    columns = {
+        "open": column("open")[first],
+        "high": np.maximum.reduceat(column("high"), first),
+        "low": np.minimum.reduceat(column("low"), first),
+        "close": column("close")[last],
+        "volume": np.add.reduceat(column("volume"), first),
+    }
+
+    data = pd.DataFrame(
+        {name: values[complete] for name, values in columns.items()},
+        index=pd.to_datetime(buckets[complete], unit="ms", utc=True).rename("datetime"),
+    )
+    if "symbol" in df.columns:
+        data["symbol"] = df["symbol"].iloc[0]
+    return data
@@ -1,7 +1,14 @@
 import click
+import numpy as np
 import backtrader as bt
 
-from data import download
+from data import load
+from feeds.arrayfeed import ArrayData
+from engine import backtest, pct_change
+from profiling import Profiler
+from indicators.cached import CachedIndicators
+from report import render_report
+from analyzers.value_curve import ValueCurve
 
 
 class ReveralStrategy(bt.Strategy):
@@ -29,28 +36,89 @@ class ReveralStrategy(bt.Strategy):
                 self.close()
 
 
-@click.command()
-@click.option("--symbol", default="ETH/USDT", help="标的标识")
-@click.option("--start-date", default="2020-01-01", help="开始时间")
-@click.option("--end-date", default="2025-11-30", help="结束时间")
-@click.option("--interval", default="1h", help="结束时间")
-def main(symbol, start_date, end_date, interval):
+def vector_targets(df):
+    """ReveralStrategy 的目标仓位比例，供 engine.backtest 使用"""
+    returns = pct_change(df["close"].to_numpy())
+    targets = np.full(len(returns), np.nan)
+
+    holding = False
+    barssince = 0
+    for i in range(1, len(returns) - 1):
+        if not holding:
+            if returns[i] < -0.005:
+                targets[i] = 1.0
+                holding = True
+                barssince = 0
+        else:
+            barssince += 1
+            if returns[i] > 0.005 or barssince >= 5:
+                targets[i] = 0.0
+                holding = False
+
+    return targets
+
+
+def run(
+    symbol,
+    start_date,
+    end_date,
+    interval,
+    base_interval,
+    datafile,
+    fast,
+    report,
+    plot,
+    no_indicator_cache,
+    profile,
+    cprofile,
+    profile_output,
+):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     cerebro = bt.Cerebro(stdstats=False)
     cerebro.broker.setcommission(0.001, leverage=2.0)
     cerebro.addobserver(bt.observers.Value)
 
-    df = download(
-        symbol=symbol, start_date=start_date, end_date=end_date, interval=interval
-    )
-    data = bt.feeds.PandasData(dataname=df)
+    with profiler.phase("download"):
+        df = load(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            datafile=datafile,
+            base_interval=base_interval,
+        )
+    if fast:
+        with profiler.phase("vector"):
+            result = backtest(
+                df,
+                target_percent=vector_targets(df),
+                cash=cerebro.broker.getcash(),
+                commission=0.001,
+                leverage=2.0,
+            )
+        print(f"最终持仓价值：{result.value}")
+        print(f"最大回撤：{result.max_drawdown}")
+        profiler.finish(profile_output)
+        return
+
+    data = ArrayData(dataname=df)
     data.plotinfo.plot = False
     cerebro.adddata(data)
 
     cerebro.addstrategy(ReveralStrategy)
+    cerebro.addanalyzer(ValueCurve, _name="value")
 
-    cerebro.run()
-    cerebro.plot()
+    with CachedIndicators(not no_indicator_cache):
+        strats = profiler.run(cerebro)
+    with profiler.phase("plot"):
+        render_report(strats[0], report)
+        click.echo(f"报告已保存到: {report}")
+        if plot:
+            cerebro.plot()
+    profiler.finish(profile_output)
 
 
 if __name__ == "__main__":
+    from commands.reversal import main
+
     main()
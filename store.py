@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.int64()),
+        ("open", pa.float32()),
+        ("high", pa.float32()),
+        ("low", pa.float32()),
+        ("close", pa.float32()),
+        ("volume", pa.float32()),
+    ]
+)
+
+
+def bars_path(root, symbol, interval):
+    return os.path.join(root, symbol.replace("/", "_"), interval)
+
+
+def save_bars(data, root, symbol, interval):
+    """
+    按月分区写入列式 K 线库: root/BTC_USDT/1h/month=2020-01/data.parquet
+
+    data 为 download() 返回的 DataFrame，已有月份会与新数据合并（新数据优先）
+    """
+    path = bars_path(root, symbol, interval)
+
+    frame = pd.DataFrame(
+        {
+            "timestamp": data.index.as_unit("ms").asi8,
+            **{col: data[col].to_numpy() for col in SCHEMA.names[1:]},
+        }
+    )
+    months = data.index.strftime("%Y-%m")
+
+    for month, group in frame.groupby(months):
+        month_dir = os.path.join(path, f"month={month}")
+        filename = os.path.join(month_dir, "data.parquet")
+        if os.path.exists(filename):
+            old = pq.read_table(filename).to_pandas()
+            group = pd.concat([old, group])
+            group = group.drop_duplicates(subset="timestamp", keep="last")
+        group = group.sort_values("timestamp")
+
+        os.makedirs(month_dir, exist_ok=True)
+        table = pa.Table.from_pandas(group, schema=SCHEMA, preserve_index=False)
+        pq.write_table(table, filename)
+
+    return path
+
+
+def load_bars(root, symbol, interval, start_date=None, end_date=None):
+    """
+    从列式 K 线库读取 [start_date, end_date] 内的 K 线，返回与 download() 相同结构的 DataFrame
+
+    月份分区和 timestamp 过滤都会下推到 parquet 读取，不在范围内的文件和 row group 不会被读取
+    """
+    dataset = ds.dataset(
+        bars_path(root, symbol, interval),
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("month", pa.string())]), flavor="hive"
+        ),
+    )
+
+    expr = None
+    if start_date is not None:
+        start = _utc_timestamp(start_date)
+        expr = _and(expr, ds.field("month") >= start.strftime("%Y-%m"))
+        expr = _and(expr, ds.field("timestamp") >= start.value // 10**6)
+    if end_date is not None:
+        end = _utc_timestamp(end_date)
+        expr = _and(expr, ds.field("month") <= end.strftime("%Y-%m"))
+        expr = _and(expr, ds.field("timestamp") <= end.value // 10**6)
+
+    table = dataset.to_table(columns=SCHEMA.names, filter=expr)
+    data = table.to_pandas().sort_values("timestamp")
+    data["datetime"] = pd.to_datetime(data["timestamp"], unit="ms", utc=True)
+    data.set_index("datetime", inplace=True)
+    data.drop(columns=["timestamp"], inplace=True)
+    data["symbol"] = symbol
+
+    return data
+
+
+def _utc_timestamp(date):
+    date = pd.Timestamp(date)
+    if date.tzinfo is None:
+        return date.tz_localize("UTC")
+    return date.tz_convert("UTC")
+
+
+def _and(expr, other):
+    return other if expr is None else expr & other
@@ -0,0 +1,346 @@
+import os
+import json
+import hashlib
+import itertools
+import functools
+import contextlib
+import importlib
+import multiprocessing as mp
+
+from multiprocessing import shared_memory
+
+import click
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+from data import load
+from barfile import is_bar_file, open_bars, slice_bars
+from feeds.arrayfeed import ArrayData
+from feeds.memmapfeed import MemmapData
+from indicators.cached import CachedIndicators
+from analyzers.annualized_volatility import AnnualizedVolatility
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+_worker = {}
+
+
+def param_grid(grid):
+    """{name: [v1, v2]} -> [{name: v1}, {name: v2}]"""
+    names = list(grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def param_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def to_shared(df):
+    """把 K 线写入共享内存，返回 (SharedMemory, shape)，worker 按名字挂载，不需要 pickle DataFrame"""
+    values = np.empty((len(df), len(COLUMNS)), dtype=np.float64)
+    values[:, 0] = df.index.as_unit("ms").asi8
+    for i, column in enumerate(COLUMNS[1:], start=1):
+        values[:, i] = df[column].to_numpy(dtype=np.float64)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+    return shm, values.shape
+
+
+def from_shared(shm, shape):
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    index = pd.to_datetime(values[:, 0].astype(np.int64), unit="ms", utc=True)
+    return pd.DataFrame(
+        values[:, 1:], index=index.rename("datetime"), columns=COLUMNS[1:], copy=False
+    )
+
+
+def _init_worker(source, strategy, broker):
+    if source[0] == "file":
+        # K 线文件由各 worker 自行 memmap，共用操作系统的页缓存
+        _, path, start_date, end_date = source
+        _worker["data"] = slice_bars(open_bars(path), start_date, end_date)
+    else:
+        _, shm_name, shape = source
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker["shm"] = shm
+        _worker["data"] = from_shared(shm, shape)
+    _worker["strategy"] = strategy
+    _worker["broker"] = broker
+
+
+def run_in_worker(runner, params):
+    """在 worker_pool 的进程中调用 runner(data, strategy, params, **broker)"""
+    return runner(_worker["data"], _worker["strategy"], params, **_worker["broker"])
+
+
+@contextlib.contextmanager
+def worker_pool(df, strategy, broker, processes=None, start_date=None, end_date=None):
+    """
+    创建挂载好 K 线的进程池
+
+    df 为 DataFrame 时 K 线只加载一次并放进共享内存，worker 启动时挂载；
+    df 为 K 线文件路径（barfile.write_bars 写出）时各 worker 直接 memmap 该文件，
+    按 start_date/end_date 截取
+    """
+    if isinstance(df, str):
+        shm = None
+        source = ("file", df, start_date, end_date)
+    else:
+        shm, shape = to_shared(df)
+        source = ("shm", shm.name, shape)
+    try:
+        with mp.Pool(
+            processes=processes or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(source, strategy, broker),
+        ) as pool:
+            yield pool
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def worker_cerebro(low_memory=False):
+    """
+    worker 中运行回测的 Cerebro
+
+    默认 preload：每个 worker 把 K 线各列拷进自己的 line buffer，回测最快，可以使用指标缓存。
+    low_memory 时不 preload 且 exactbars=1，逐根从共享内存或 memmap 读取 K 线，
+    line buffer 只保留需要的长度，不随 K 线数增长，各 worker 不再各拷一份 K 线；
+    代价是回测约慢 1-2 倍，且不使用指标缓存（见 CachedIndicators）。
+    start() 中读取全部 K 线的策略设置 requires_preload = True，见 check_low_memory
+    """
+    if low_memory:
+        return bt.Cerebro(stdstats=False, preload=False, exactbars=1)
+    return bt.Cerebro(stdstats=False)
+
+
+def check_low_memory(strategy, low_memory):
+    """low_memory 时拒绝依赖 preload 的策略，在启动进程池之前报错"""
+    if low_memory and getattr(strategy, "requires_preload", False):
+        raise ValueError(
+            f"{strategy.__name__} requires preload, run without low_memory"
+        )
+
+
+def data_feed(df):
+    """worker 中的 K 线为 DataFrame（共享内存）或 memmap 数组（K 线文件）"""
+    if isinstance(df, np.ndarray):
+        return MemmapData(dataname=df)
+    return ArrayData(dataname=df)
+
+
+def run_backtest(
+    df,
+    strategy,
+    params,
+    cash=1e8,
+    commission=0.0005,
+    leverage=1.0,
+    indicator_cache=True,
+    low_memory=False,
+):
+    cerebro = worker_cerebro(low_memory)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission, leverage=leverage)
+    cerebro.adddata(data_feed(df))
+    cerebro.addstrategy(strategy, **params)
+
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe")
+    cerebro.addanalyzer(AnnualizedVolatility, _name="annual_vol")
+
+    with CachedIndicators(indicator_cache):
+        strat = cerebro.run()[0]
+    analyzers = strat.analyzers
+    return {
+        **params,
+        "value": cerebro.broker.getvalue(),
+        "max_drawdown": analyzers.drawdown.get_analysis()["max"]["drawdown"],
+        "sharpe": analyzers.sharpe.get_analysis()["sharperatio"],
+        "annual_vol": analyzers.annual_vol.get_analysis()["annual_vol"],
+    }
+
+
+def sweep_header(df, strategy, cash, commission, leverage, start_date, end_date):
+    """
+    结果文件的首行：策略、K 线（条数、起止时间和指纹）和 broker 设置
+
+    指纹取自实际回测用的时间戳和收盘价，标的、周期或时间范围不同时都会变化
+    """
+    if isinstance(df, str):
+        bars = slice_bars(open_bars(df), start_date, end_date)
+        timestamps, close = bars["timestamp"], bars["close"]
+    else:
+        timestamps, close = df.index.as_unit("ms").asi8, df["close"]
+    timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+    digest = hashlib.sha1(timestamps)
+    digest.update(np.ascontiguousarray(close, dtype=np.float64))
+    header = {
+        "strategy": f"{strategy.__module__}:{strategy.__qualname__}",
+        "bars": len(timestamps),
+        "start": int(timestamps[0]) if len(timestamps) else None,
+        "end": int(timestamps[-1]) if len(timestamps) else None,
+        "data": digest.hexdigest(),
+        "cash": cash,
+        "commission": commission,
+        "leverage": leverage,
+    }
+    # 与从文件读回的结果可以直接比较
+    return json.loads(json.dumps(header))
+
+
+def load_results(path, header):
+    """
+    读取已完成的结果；文件首行的 header 与本次不同时报错，避免混入其他策略或数据的结果
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines:
+        return []
+    if lines[0].get("header") != header:
+        raise ValueError(
+            f"{path} was written by a different sweep "
+            f"(expected {header}, found {lines[0].get('header')}), "
+            "use another output file or remove it"
+        )
+    return lines[1:]
+
+
+def sweep(
+    df,
+    strategy,
+    grid,
+    output=None,
+    processes=None,
+    cash=1e8,
+    commission=0.0005,
+    leverage=1.0,
+    start_date=None,
+    end_date=None,
+    indicator_cache=True,
+    low_memory=False,
+):
+    """
+    在进程池中对 strategy 做参数网格回测，返回结果表
+
+    df 为 DataFrame 或 K 线文件路径，见 worker_pool；
+    每个结果完成后立即追加到 output（JSON Lines），再次运行时跳过已完成的参数组合；
+    output 首行记录策略、K 线和 broker 设置（见 sweep_header），与本次不同时报错。
+    indicator_cache 见 CachedIndicators，参数相同的指标在各组合、各次运行之间只计算一次；
+    low_memory 见 worker_cerebro
+    """
+    check_low_memory(strategy, low_memory)
+    names = list(grid)
+    header = None
+    if output:
+        header = sweep_header(
+            df, strategy, cash, commission, leverage, start_date, end_date
+        )
+    done = load_results(output, header)
+    done_keys = {param_key({name: r[name] for name in names}) for r in done}
+    todo = [p for p in param_grid(grid) if param_key(p) not in done_keys]
+
+    results = list(done)
+    if todo:
+        broker = dict(
+            cash=cash,
+            commission=commission,
+            leverage=leverage,
+            indicator_cache=indicator_cache,
+            low_memory=low_memory,
+        )
+        run_one = functools.partial(run_in_worker, run_backtest)
+        with worker_pool(df, strategy, broker, processes, start_date, end_date) as pool:
+            out = open(output, "a") if output else None
+            try:
+                if out and out.tell() == 0:
+                    out.write(json.dumps({"header": header}) + "\n")
+                for result in pool.imap_unordered(run_one, todo):
+                    results.append(result)
+                    if out:
+                        out.write(json.dumps(result) + "\n")
+                        out.flush()
+            finally:
+                if out:
+                    out.close()
+
+    return pd.DataFrame(results).sort_values(names).reset_index(drop=True)
+
+
+def parse_value(value):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def import_strategy(path):
+    module_name, class_name = path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def run(
+    strategy,
+    params,
+    symbol,
+    datafile,
+    interval,
+    base_interval,
+    start_date,
+    end_date,
+    cash,
+    commission,
+    leverage,
+    processes,
+    output,
+    no_indicator_cache,
+    low_memory,
+):
+    grid = {}
+    for param in params:
+        name, values = param.split("=", 1)
+        grid[name] = [parse_value(v) for v in values.split(",")]
+
+    if datafile and is_bar_file(datafile) and not base_interval:
+        df = datafile
+    else:
+        df = load(
+            symbol,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            datafile=datafile,
+            base_interval=base_interval,
+        )
+    results = sweep(
+        df,
+        import_strategy(strategy),
+        grid,
+        output=output,
+        processes=processes,
+        cash=cash,
+        commission=commission,
+        leverage=leverage,
+        start_date=start_date,
+        end_date=end_date,
+        indicator_cache=not no_indicator_cache,
+        low_memory=low_memory,
+    )
+    click.echo(results.to_string())
+
+
+if __name__ == "__main__":
+    from commands.sweep import main
+
+    main()
@@ -0,0 +1,46 @@
+import itertools
+
+import backtrader as bt
+import pytest
+
+from analyzers.annualized_volatility import AnnualizedVolatility
+from benchmark import synthetic_bars
+from feeds.arrayfeed import ArrayData
+from reversal import ReveralStrategy
+
+OPTIONS = [
+    dict(timeframe=timeframe, use_log=use_log, stddev_sample=stddev_sample)
+    for timeframe, use_log, stddev_sample in itertools.product(
+        (bt.TimeFrame.Days, bt.TimeFrame.Weeks, bt.TimeFrame.Months),
+        (False, True),
+        (False, True),
+    )
+]
+OPTIONS += [
+    dict(timeframe=bt.TimeFrame.Days, compression=3),
+    dict(timeframe=bt.TimeFrame.Minutes, compression=60, factor=24 * 365),
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_streaming_matches_batch(options):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcommission(0.001, leverage=2.0)
+    cerebro.adddata(
+        ArrayData(
+            dataname=synthetic_bars(24 * 120, interval="1h"),
+            timeframe=bt.TimeFrame.Minutes,
+            compression=60,
+        )
+    )
+    cerebro.addstrategy(ReveralStrategy)
+    cerebro.addanalyzer(AnnualizedVolatility, _name="batch", **options)
+    cerebro.addanalyzer(AnnualizedVolatility, _name="stream", streaming=True, **options)
+    strat = cerebro.run()[0]
+
+    batch = strat.analyzers.batch.get_analysis()
+    stream = strat.analyzers.stream.get_analysis()
+    assert batch["n_periods"] > 1
+    assert stream["n_periods"] == batch["n_periods"]
+    assert stream["annual_vol"] == pytest.approx(batch["annual_vol"], rel=1e-9)
+    assert stream["std_period"] == pytest.approx(batch["std_period"], rel=1e-9)
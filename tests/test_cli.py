@@ -0,0 +1,14 @@
+import pytest
+
+from benchmark import startup_budget, startup_time
+from cli import COMMANDS
+
+
+@pytest.mark.parametrize(
+    "args", [["--help"]] + [[name, "--help"] for name in COMMANDS], ids=" ".join
+)
+def test_help_startup(args):
+    """cli.py 及各子命令 --help 不导入 backtrader、pandas 等，启动耗时在预算内"""
+    seconds, modules = startup_time(args, repeat=3)
+    assert modules == []
+    assert seconds <= startup_budget(args)
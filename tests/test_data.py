@@ -0,0 +1,147 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import data
+from cache import OHLCVCache, merge_bars
+
+HOUR = 60 * 60 * 1000
+LISTED = 1704067200000  # 2024-01-01 00:00 UTC
+
+
+class FakeExchange:
+    """按小时生成确定性 K 线的假交易所，记录每次 fetch_ohlcv 的 since"""
+
+    markets = {"FAKE/USDT": {}}
+    rateLimit = 0
+
+    def __init__(self, bars=24 * 60):
+        ts = LISTED + np.arange(bars) * HOUR
+        close = 100.0 + np.arange(bars)
+        self.bars = np.column_stack([ts, close, close + 1, close - 1, close, close])
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, since, timeframe, limit):
+        assert timeframe == "1h"
+        self.calls.append(since)
+        rows = self.bars[self.bars[:, 0] >= since][:limit]
+        # 与 ccxt 一致，时间戳为 int
+        return [[int(row[0]), *row[1:]] for row in rows.tolist()]
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    exchange = FakeExchange()
+    monkeypatch.setitem(data.exchanges, "fake", exchange)
+    return exchange
+
+
+def download(cache, start_date, end_date):
+    return data.download(
+        "FAKE/USDT",
+        start_date=start_date,
+        end_date=end_date,
+        interval="1h",
+        exchange_name="fake",
+        cache=cache,
+    )
+
+
+def test_cold_cache(exchange, tmp_path):
+    df = download(OHLCVCache(str(tmp_path)), "2024-01-01", "2024-01-10")
+
+    assert exchange.calls
+    assert len(df) == 9 * 24 + 1
+    ts = df.index.as_unit("ms").asi8
+    assert ts[0] == LISTED
+    assert np.all(np.diff(ts) == HOUR)
+    assert df.attrs["integrity"]["missing"] == 0
+    assert list(tmp_path.glob("*.npz"))
+
+
+def test_warm_cache(exchange, tmp_path):
+    cache = OHLCVCache(str(tmp_path))
+    cold = download(cache, "2024-01-01", "2024-01-10")
+    exchange.calls.clear()
+
+    warm = download(cache, "2024-01-01", "2024-01-10")
+    assert exchange.calls == []
+    assert warm.equals(cold)
+
+
+@pytest.mark.parametrize("size", [0, 10, 1000])
+def test_corrupt_cache_is_a_miss(exchange, tmp_path, size):
+    cache = OHLCVCache(str(tmp_path))
+    cold = download(cache, "2024-01-01", "2024-01-10")
+    (path,) = tmp_path.glob("*.npz")
+    # 截断的文件
+    path.write_bytes(path.read_bytes()[:size])
+    exchange.calls.clear()
+
+    again = download(cache, "2024-01-01", "2024-01-10")
+    assert exchange.calls
+    assert again.equals(cold)
+    assert cache.load("fake", "FAKE/USDT", "1h")[0] is not None
+
+
+def test_partial_overlap(exchange, tmp_path):
+    cache = OHLCVCache(str(tmp_path))
+    download(cache, "2024-01-03", "2024-01-06")
+    _, (lo, hi) = cache.load("fake", "FAKE/USDT", "1h")
+    exchange.calls.clear()
+
+    df = download(cache, "2024-01-01", "2024-01-10")
+    # 只请求缓存未覆盖的头尾区间
+    assert exchange.calls
+    assert all(since < lo or since > hi for since in exchange.calls)
+    assert cache.load("fake", "FAKE/USDT", "1h")[1] == (
+        LISTED,
+        LISTED + 9 * 24 * HOUR,
+    )
+
+    full = download(OHLCVCache(str(tmp_path / "full")), "2024-01-01", "2024-01-10")
+    assert df.equals(full)
+
+
+def test_merge_bars_dedup():
+    a = [[3 * HOUR, 1, 1, 1, 1, 1], [1 * HOUR, 1, 1, 1, 1, 1]]
+    b = [[2 * HOUR, 2, 2, 2, 2, 2], [3 * HOUR, 2, 2, 2, 2, 2]]
+
+    bars = merge_bars(a, b)
+    assert bars[:, 0].tolist() == [HOUR, 2 * HOUR, 3 * HOUR]
+    # 时间戳重复时以后面的一段为准
+    assert bars[:, 1].tolist() == [1, 2, 2]
+    assert merge_bars(np.empty((0, 6))).shape == (0, 6)
+
+
+def test_download_rejects_month_base_interval(exchange, tmp_path):
+    with pytest.raises(ValueError, match="1M"):
+        data.download(
+            "FAKE/USDT",
+            interval="1y",
+            base_interval="1M",
+            exchange_name="fake",
+            cache=OHLCVCache(str(tmp_path)),
+        )
+    assert exchange.calls == []
+
+
+def test_concurrent_saves_same_key(tmp_path):
+    cache = OHLCVCache(str(tmp_path))
+    bars = [np.full((100, 6), float(i)) for i in range(8)]
+
+    def save(i):
+        for _ in range(20):
+            cache.save("fake", "FAKE/USDT", "1h", bars[i], (0, i))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(save, range(8)))
+
+    loaded, coverage = cache.load("fake", "FAKE/USDT", "1h")
+    i = coverage[1]
+    assert np.array_equal(loaded, bars[i])
+    assert [p.name for p in tmp_path.iterdir()] == [
+        os.path.basename(cache.path("fake", "FAKE/USDT", "1h"))
+    ]
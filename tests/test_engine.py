@@ -0,0 +1,65 @@
+import backtrader as bt
+import numpy as np
+import pytest
+
+from analyzers.value_curve import ValueCurve
+from benchmark import synthetic_bars
+from engine import backtest
+from feeds.arrayfeed import ArrayData
+import dca.rsi_dca as rsi_dca
+import reversal
+import voltarget
+
+
+def run_cerebro(df, strategy, cash, commission, leverage=1.0, **params):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission, leverage=leverage)
+    cerebro.adddata(ArrayData(dataname=df))
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addanalyzer(ValueCurve, _name="value")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    strat = cerebro.run()[0]
+    return (
+        strat.analyzers.value.get_analysis(),
+        strat.analyzers.drawdown.get_analysis()["max"]["drawdown"],
+    )
+
+
+# 各脚本 --fast 分支与 backtrader 分支的设置一致
+CASES = {
+    "reversal": (
+        reversal.ReveralStrategy,
+        {},
+        lambda df: {"target_percent": reversal.vector_targets(df)},
+        dict(cash=10000.0, commission=0.001, leverage=2.0),
+    ),
+    "voltarget": (
+        voltarget.VolTarget,
+        {},
+        lambda df: {"target_percent": voltarget.vector_targets(df)},
+        dict(cash=1e8, commission=0.0005, leverage=2.0),
+    ),
+    "rsi_dca": (
+        rsi_dca.DCAStrategy,
+        {"investment_amount": 1000},
+        lambda df: {"order_value": rsi_dca.vector_orders(df, investment_amount=1000)},
+        dict(cash=1e8, commission=0.001),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_backtest_matches_cerebro(name):
+    strategy, params, orders, broker = CASES[name]
+    df = synthetic_bars(3000, interval="1h", seed=1)
+
+    result = backtest(df, **orders(df), **broker)
+    values, drawdown = run_cerebro(df, strategy, **broker, **params)
+
+    assert result.orders > 0
+    # ValueCurve 从策略的 minperiod 开始记录
+    np.testing.assert_allclose(
+        result.frame["value"].to_numpy()[-len(values) :], values, rtol=1e-9
+    )
+    assert result.max_drawdown == pytest.approx(drawdown, rel=1e-9)
@@ -0,0 +1,40 @@
+import backtrader as bt
+
+from benchmark import synthetic_bars
+from cache import IndicatorCache
+from feeds.arrayfeed import ArrayData
+from indicators.cached import CachedIndicators
+from voltarget import VolTarget
+
+
+def run_voltarget(df, cache):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1e8)
+    cerebro.broker.setcommission(0.0005, leverage=2.0)
+    cerebro.adddata(ArrayData(dataname=df))
+    cerebro.addstrategy(VolTarget)
+    with CachedIndicators(cache) as cached:
+        cerebro.run()
+    return cerebro.broker.getvalue(), cached.hits, cached.misses
+
+
+def test_cold_warm_and_changed_data(tmp_path):
+    cache = IndicatorCache(str(tmp_path))
+    df = synthetic_bars(2000, interval="1h")
+    expected, _, _ = run_voltarget(df, None)
+
+    # PercentChange 和以它为输入的 StandardDeviation
+    value, hits, misses = run_voltarget(df, cache)
+    assert (hits, misses) == (0, 2)
+    assert value == expected
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+    value, hits, misses = run_voltarget(df, cache)
+    assert (hits, misses) == (2, 0)
+    assert value == expected
+
+    changed = df.copy()
+    changed.iloc[1000, changed.columns.get_loc("close")] *= 1.01
+    value, hits, misses = run_voltarget(changed, cache)
+    assert (hits, misses) == (0, 2)
+    assert value == run_voltarget(changed, None)[0]
@@ -0,0 +1,82 @@
+import math
+
+import backtrader as bt
+import numpy as np
+
+from benchmark import synthetic_bars
+from feeds.arrayfeed import ArrayData
+from feeds.panelfeed import add_panel
+from momentum import MomentumStrategy
+from panel import panel_from_frames
+
+
+def staggered_frames(count=6, bars=300):
+    """上市时间不同、中间缺若干根 K 线的多个标的"""
+    frames = {}
+    for i in range(count):
+        df = synthetic_bars(bars, interval="1d", seed=i, symbol=f"S{i}")
+        frames[f"S{i}"] = df.iloc[i * 20 :].drop(df.index[100 + i :: 50])
+    return frames
+
+
+def test_panel_alignment():
+    frames = staggered_frames()
+    panel = panel_from_frames(frames)
+
+    assert panel.values.shape == (300, 6, 5)
+    assert panel.present.sum() == sum(len(df) for df in frames.values())
+    # 上市前为 NaN，上市后缺的 K 线沿用上一根收盘价、成交量为 0
+    close, volume = panel.field("close"), panel.field("volume")
+    assert np.isnan(close[:20, 1]).all() and not np.isnan(close[20:, 1]).any()
+    filled = panel.started() & ~panel.present
+    assert filled.any()
+    rows, cols = np.nonzero(filled)
+    assert np.array_equal(close[rows, cols], close[rows - 1, cols])
+    assert (volume[filled] == 0).all()
+
+
+def run_momentum(frames, panel):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1e8)
+    cerebro.broker.setcommission(0.0005)
+    if panel:
+        add_panel(cerebro, panel_from_frames(frames))
+    else:
+        for symbol, df in frames.items():
+            cerebro.adddata(ArrayData(dataname=df, name=symbol))
+    cerebro.addstrategy(MomentumStrategy)
+    cerebro.run()
+    return cerebro.broker.getvalue(), len(cerebro.broker.orders)
+
+
+def test_panel_matches_separate_feeds():
+    # 没有缺口时与逐个标的添加 data 的结果一致
+    frames = {
+        symbol: synthetic_bars(300, interval="1d", seed=i, symbol=symbol).iloc[i * 20 :]
+        for i, symbol in enumerate(f"S{i}" for i in range(6))
+    }
+    value, orders = run_momentum(frames, panel=True)
+    expected_value, expected_orders = run_momentum(frames, panel=False)
+    assert orders == expected_orders
+    assert math.isclose(value, expected_value, rel_tol=1e-12)
+
+
+class TouchAll(bt.Strategy):
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        for data in self.datas:
+            self.getposition(data)
+        self.values.append(self.broker.getvalue())
+
+    def start(self):
+        self.values = []
+
+
+def test_panel_value_before_listing():
+    cerebro = bt.Cerebro()
+    add_panel(cerebro, panel_from_frames(staggered_frames()))
+    cerebro.addstrategy(TouchAll)
+    strategy = cerebro.run()[0]
+    assert not any(math.isnan(v) for v in strategy.values)
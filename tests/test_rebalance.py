@@ -0,0 +1,58 @@
+import math
+
+import backtrader as bt
+
+from benchmark import synthetic_bars
+from feeds.arrayfeed import ArrayData
+from rebalance import Rebalancer
+
+NAN = math.nan
+HOLD = [NAN, NAN, NAN]
+
+
+class Steps(bt.Strategy):
+    """第 i 根 K 线按 steps[i] 调仓（HOLD 为不调仓），记录每次下单的标的"""
+
+    params = (("steps", ()), ("band", 0.0), ("min_notional", 0.0))
+
+    def start(self):
+        self.rebalancer = Rebalancer(
+            self, band=self.p.band, min_notional=self.p.min_notional
+        )
+        self.placed = []
+
+    def next(self):
+        i = len(self) - 1
+        if i < len(self.p.steps):
+            orders = self.rebalancer(self.p.steps[i])
+            self.placed.append(sorted(order.data._name for order in orders))
+
+
+def run_steps(steps, **params):
+    # 价格恒为 100、无手续费，账户价值始终为 1e6，调仓金额 = 权重变化 * 1e6
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1e6)
+    for name in "ABC":
+        df = synthetic_bars(10, interval="1d")
+        df[["open", "high", "low", "close"]] = 100.0
+        cerebro.adddata(ArrayData(dataname=df), name=name)
+    cerebro.addstrategy(Steps, steps=steps, **params)
+    return cerebro.run()[0]
+
+
+def test_band_skips_small_trades():
+    strat = run_steps(
+        [[0.3, 0.3, 0.3], HOLD, [0.31, 0.35, NAN], [0.3, 0.3, 0.3]], band=0.02
+    )
+    # 10000 < 0.02 * 1e6 跳过，50000 下单，NaN 不调仓；权重不变时不下单也不计跳过
+    assert strat.placed == [["A", "B", "C"], [], ["B"], ["B"]]
+    assert strat.rebalancer.skipped == 1
+    assert strat.rebalancer.submitted == 5
+    assert [strat.getposition(d).size for d in strat.datas] == [3000, 3000, 3000]
+
+
+def test_min_notional_skips_small_trades():
+    strat = run_steps([[0.3, 0.3, 0.3], HOLD, [0.301, 0.31, 0.3]], min_notional=5000)
+    # 1000 < 5000 跳过，10000 下单
+    assert strat.placed == [["A", "B", "C"], [], ["B"]]
+    assert strat.rebalancer.skipped == 1
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from benchmark import synthetic_bars
+from resample import base_step, interval_ms, resample
+
+
+def pandas_resample(df, rule):
+    return (
+        df.resample(rule)
+        .agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+            }
+        )
+        .dropna()
+    )
+
+
+@pytest.mark.parametrize("interval, rule", [("4h", "4h"), ("1d", "1D")])
+def test_resample_matches_pandas(interval, rule):
+    df = synthetic_bars(24 * 30, interval="1h")
+    out = resample(df, interval, "1h")
+    expected = pandas_resample(df.drop(columns="symbol"), rule)
+    expected.index = expected.index.as_unit("ms")
+    pd.testing.assert_frame_equal(
+        out.drop(columns="symbol"), expected, check_freq=False, check_names=False
+    )
+
+
+def test_resample_months():
+    df = synthetic_bars(24 * 90, interval="1h", start="2024-01-01")
+    out = resample(df, "1M", "1h")
+    # 3 月没有完整覆盖（90 天到 3 月 30 日），只输出完整的 1、2 月
+    assert list(out.index.month) == [1, 2]
+    assert out["volume"].iloc[0] == pytest.approx(df["volume"].iloc[: 24 * 31].sum())
+
+
+def test_interval_ms():
+    assert interval_ms("4h") == 4 * 60 * 60 * 1000
+    assert base_step("1w") == 7 * 24 * 60 * 60 * 1000
+    with pytest.raises(ValueError):
+        interval_ms("1x")
+
+
+def test_base_step_rejects_months():
+    for interval in ("1M", "1y"):
+        with pytest.raises(ValueError, match="no fixed length"):
+            base_step(interval)
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from benchmark import synthetic_bars
+from dca.periodic_dca import DCAStrategy
+from momentum import MomentumStrategy
+from sweep import sweep
+
+
+def test_low_memory_matches_preload():
+    df = synthetic_bars(2000, interval="1d")
+    grid = {"investment_interval": ["1w", "1m"], "investment_dayoffset": [1, 5]}
+    options = dict(processes=1, indicator_cache=False)
+
+    preload = sweep(df, DCAStrategy, grid, **options)
+    low_memory = sweep(df, DCAStrategy, grid, low_memory=True, **options)
+
+    assert (preload["value"] != 1e8).all()
+    pd.testing.assert_frame_equal(low_memory, preload)
+
+
+def test_low_memory_rejects_preload_only_strategy():
+    df = synthetic_bars(100, interval="1d")
+    with pytest.raises(ValueError, match="requires preload"):
+        sweep(df, MomentumStrategy, {"band": [None]}, processes=1, low_memory=True)
+
+
+def test_resume_checks_header(tmp_path):
+    df = synthetic_bars(500, interval="1d")
+    output = str(tmp_path / "results.jsonl")
+    options = dict(output=output, processes=1, indicator_cache=False)
+
+    first = sweep(df, DCAStrategy, {"investment_dayoffset": [1, 2]}, **options)
+    resumed = sweep(df, DCAStrategy, {"investment_dayoffset": [1, 2, 3]}, **options)
+    pd.testing.assert_frame_equal(resumed.iloc[:2], first)
+    with open(output) as f:
+        lines = f.read().splitlines()
+    # header + 3 个组合，已完成的组合没有重复运行
+    assert len(lines) == 4 and '"header"' in lines[0]
+
+    grid = {"investment_dayoffset": [1]}
+    with pytest.raises(ValueError, match="different sweep"):
+        sweep(df, DCAStrategy, grid, commission=0.001, **options)
+    with pytest.raises(ValueError, match="different sweep"):
+        sweep(df.iloc[100:], DCAStrategy, grid, **options)
+    with pytest.raises(ValueError, match="different sweep"):
+        sweep(df, MomentumStrategy, {"band": [None]}, **options)
@@ -1,8 +1,13 @@
 import backtrader as bt
 import numpy as np
 import click
-import yfinance as yf
 from analyzers.annualized_volatility import AnnualizedVolatility
+from feeds.arrayfeed import ArrayData
+from engine import backtest, column, pct_change, stddev
+from profiling import Profiler
+from indicators.cached import CachedIndicators
+from report import render_report
+from analyzers.value_curve import ValueCurve
 
 import warnings
 
@@ -39,13 +44,29 @@ class VolTarget(bt.Strategy):
         print("组合价值:", self.broker.getvalue())
 
 
-@click.command()
-@click.option("--symbol", default="SPY", help="")
-@click.option("--max-leverage", default=1.5, help="")
-@click.option("--target-volatility", default=0.2, help="")
-@click.option("--start-date", default="2015-01-01", help="")
-@click.option("--end-date", default="2025-11-30", help="")
-def main(symbol, max_leverage, target_volatility, start_date, end_date):
+def vector_targets(df, period=20, target_vol=0.15, max_leverage=1.5, annual_factor=252):
+    """VolTarget 的目标仓位比例，供 engine.backtest 使用"""
+    returns = pct_change(column(df, "close"))
+    volatility = stddev(returns, period) * np.sqrt(annual_factor)
+    with np.errstate(divide="ignore"):
+        return np.minimum(target_vol / volatility, max_leverage)
+
+
+def run(
+    symbol,
+    max_leverage,
+    target_volatility,
+    start_date,
+    end_date,
+    fast,
+    report,
+    plot,
+    no_indicator_cache,
+    profile,
+    cprofile,
+    profile_output,
+):
+    profiler = Profiler.from_options(profile, cprofile, profile_output)
     cerebro = bt.Cerebro(stdstats=False)
 
     cerebro.broker.setcash(1e8)
@@ -59,15 +80,35 @@ def main(symbol, max_leverage, target_volatility, start_date, end_date):
     cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
     cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe")
     cerebro.addanalyzer(AnnualizedVolatility, _name="annual_vol")
-    df = yf.download(
-        symbol,
-        start=start_date,
-        end=end_date,
-        multi_level_index=False,
-        auto_adjust=True,
-        progress=False,
-    )
-    data = bt.feeds.PandasData(dataname=df, name=symbol)
+    with profiler.phase("download"):
+        # yfinance 导入较慢，只在下载时导入
+        import yfinance as yf
+
+        df = yf.download(
+            symbol,
+            start=start_date,
+            end=end_date,
+            multi_level_index=False,
+            auto_adjust=True,
+            progress=False,
+        )
+    if fast:
+        with profiler.phase("vector"):
+            result = backtest(
+                df,
+                target_percent=vector_targets(
+                    df, target_vol=target_volatility, max_leverage=max_leverage
+                ),
+                cash=1e8,
+                commission=0.0005,
+                leverage=2,
+            )
+        print("组合价值:", result.value)
+        print("最大回撤:", result.max_drawdown)
+        profiler.finish(profile_output)
+        return
+
+    data = ArrayData(dataname=df, name=symbol)
     data.plotinfo.plot = False
     cerebro.adddata(data)
 
@@ -79,7 +120,9 @@ def main(symbol, max_leverage, target_volatility, start_date, end_date):
         VolTarget, target_vol=target_volatility, max_leverage=max_leverage
     )
 
-    strats = cerebro.run()
+    cerebro.addanalyzer(ValueCurve, _name="value")
+    with CachedIndicators(not no_indicator_cache):
+        strats = profiler.run(cerebro)
 
     sharpe_ratio = strats[0].analyzers.getbyname("sharpe").get_analysis()["sharperatio"]
     max_drawdown = (
@@ -92,8 +135,15 @@ def main(symbol, max_leverage, target_volatility, start_date, end_date):
     print("最大回撤:", max_drawdown)
     print("年化波动:", annual_volatility)
 
-    cerebro.plot()
+    with profiler.phase("plot"):
+        render_report(strats[0], report)
+        click.echo(f"报告已保存到: {report}")
+        if plot:
+            cerebro.plot()
+    profiler.finish(profile_output)
 
 
 if __name__ == "__main__":
+    from commands.voltarget import main
+
     main()
@@ -0,0 +1,258 @@
+import functools
+
+import click
+import numpy as np
+import pandas as pd
+
+from data import load
+from analyzers.value_curve import ValueCurve
+from indicators.cached import CachedIndicators
+from sweep import (
+    check_low_memory,
+    data_feed,
+    import_strategy,
+    param_grid,
+    param_key,
+    parse_value,
+    run_in_worker,
+    worker_cerebro,
+    worker_pool,
+)
+
+
+def run_curve(
+    df,
+    strategy,
+    params,
+    cash=1e8,
+    commission=0.0005,
+    leverage=1.0,
+    indicator_cache=True,
+    low_memory=False,
+):
+    cerebro = worker_cerebro(low_memory)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission, leverage=leverage)
+    cerebro.adddata(data_feed(df))
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addanalyzer(ValueCurve, _name="value")
+
+    with CachedIndicators(indicator_cache):
+        strat = cerebro.run()[0]
+    return params, strat.analyzers.value.get_analysis()
+
+
+def walk_windows(index, train, test):
+    """
+    按时间把 index 切成滚动窗口，返回 [(is_lo, is_hi, oos_lo, oos_hi)]，均为 bar 位置（左闭右开）
+
+    in-sample 长 train，紧接着 out-of-sample 长 test，之后整体向前滚动 test；
+    最后一个 out-of-sample 窗口可能不足 test
+    """
+    train, test = pd.Timedelta(train), pd.Timedelta(test)
+    windows = []
+    start = index[0]
+    while True:
+        split = start + train
+        is_lo, oos_lo, oos_hi = index.searchsorted([start, split, split + test])
+        if oos_lo >= len(index):
+            break
+        windows.append((int(is_lo), int(oos_lo), int(oos_lo), int(oos_hi)))
+        start += test
+    return windows
+
+
+def bars_per_year(index):
+    seconds = np.median(np.diff(index.as_unit("s").asi8))
+    return 365 * 86400 / seconds
+
+
+def window_scores(returns, windows, score="sharpe"):
+    """
+    returns 为 (bars, 参数组合数) 的逐 bar 收益，返回 (窗口数, 参数组合数) 的 in-sample 得分
+
+    收益、平方和、对数收益各做一次前缀和，每个窗口的得分都是 O(1) 的差分
+    """
+    zero = np.zeros((1, returns.shape[1]))
+    log_sum = np.concatenate([zero, np.cumsum(np.log1p(returns), axis=0)])
+    lo = np.array([w[0] for w in windows])
+    hi = np.array([w[1] for w in windows])
+    if score == "return":
+        return np.expm1(log_sum[hi] - log_sum[lo])
+
+    total = np.concatenate([zero, np.cumsum(returns, axis=0)])
+    square = np.concatenate([zero, np.cumsum(returns**2, axis=0)])
+    count = (hi - lo)[:, None]
+    mean = (total[hi] - total[lo]) / count
+    var = (square[hi] - square[lo]) / count - mean**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(var > 0, mean / np.sqrt(np.maximum(var, 0)), np.nan)
+
+
+class WalkForwardResult:
+    """
+    walk-forward 结果
+
+      - windows: 每个窗口的起止时间、选中的参数、in-sample 得分和 out-of-sample 收益
+      - equity: 拼接后的 out-of-sample 账户价值曲线
+    """
+
+    def __init__(self, windows, equity):
+        self.windows = windows
+        self.equity = equity
+
+    @property
+    def value(self):
+        return float(self.equity.iloc[-1])
+
+    @property
+    def max_drawdown(self):
+        peak = self.equity.cummax()
+        return float((100.0 * (peak - self.equity) / peak).max())
+
+    @property
+    def sharpe(self):
+        returns = self.equity.pct_change().dropna()
+        return float(
+            returns.mean() / returns.std() * np.sqrt(bars_per_year(self.equity.index))
+        )
+
+    def __repr__(self):
+        return (
+            f"WalkForwardResult(value={self.value:.2f}, "
+            f"max_drawdown={self.max_drawdown:.2f}, windows={len(self.windows)})"
+        )
+
+
+def walk_forward(
+    df,
+    strategy,
+    grid,
+    train="365D",
+    test="90D",
+    score="sharpe",
+    processes=None,
+    cash=1e8,
+    commission=0.0005,
+    leverage=1.0,
+    indicator_cache=True,
+    low_memory=False,
+):
+    """
+    对 strategy 做 walk-forward 优化
+
+    每个参数组合只在整段数据上用 backtrader 回测一次（进程池并行，K 线放进共享内存），
+    记录逐 bar 账户价值；各 in-sample 窗口直接在这些收益序列上打分，选出最优参数，
+    再取该参数在紧随其后的 out-of-sample 窗口内的收益拼接成资金曲线。
+    窗口之间不重建 Cerebro、不重复加载 K 线和计算指标，指标在窗口开始时已经预热。
+
+    out-of-sample 收益来自该参数的连续回测，窗口开始时的持仓是它自己此前的持仓，
+    不计切换参数时的调仓成本。low_memory 见 sweep.worker_cerebro。
+    """
+    check_low_memory(strategy, low_memory)
+    combos = param_grid(grid)
+    broker = dict(
+        cash=cash,
+        commission=commission,
+        leverage=leverage,
+        indicator_cache=indicator_cache,
+        low_memory=low_memory,
+    )
+    run_one = functools.partial(run_in_worker, run_curve)
+    with worker_pool(df, strategy, broker, processes) as pool:
+        curves = {
+            param_key(params): values
+            for params, values in pool.imap_unordered(run_one, combos)
+        }
+
+    values = np.column_stack([curves[param_key(params)] for params in combos])
+    previous = np.vstack([np.full((1, len(combos)), cash), values[:-1]])
+    returns = values / previous - 1.0
+
+    windows = walk_windows(df.index, train, test)
+    if not windows:
+        raise ValueError(f"data shorter than train window {train}")
+    scores = window_scores(returns, windows, score)
+
+    rows = []
+    oos_returns = []
+    for (is_lo, is_hi, oos_lo, oos_hi), row_scores in zip(windows, scores):
+        best = 0 if np.isnan(row_scores).all() else int(np.nanargmax(row_scores))
+        oos = returns[oos_lo:oos_hi, best]
+        oos_returns.append(oos)
+        rows.append(
+            {
+                "is_start": df.index[is_lo],
+                "oos_start": df.index[oos_lo],
+                "oos_end": df.index[oos_hi - 1],
+                **combos[best],
+                "is_score": row_scores[best],
+                "oos_return": float(np.prod(1.0 + oos) - 1.0),
+            }
+        )
+
+    first, last = windows[0][2], windows[-1][3]
+    equity = pd.Series(
+        cash * np.cumprod(1.0 + np.concatenate(oos_returns)),
+        index=df.index[first:last],
+        name="value",
+    )
+    return WalkForwardResult(pd.DataFrame(rows), equity)
+
+
+def run(
+    strategy,
+    params,
+    symbol,
+    datafile,
+    interval,
+    base_interval,
+    start_date,
+    end_date,
+    train,
+    test,
+    score,
+    cash,
+    commission,
+    leverage,
+    processes,
+    no_indicator_cache,
+    low_memory,
+):
+    grid = {}
+    for param in params:
+        name, values = param.split("=", 1)
+        grid[name] = [parse_value(v) for v in values.split(",")]
+
+    df = load(
+        symbol,
+        start_date=start_date,
+        end_date=end_date,
+        interval=interval,
+        datafile=datafile,
+        base_interval=base_interval,
+    )
+    result = walk_forward(
+        df,
+        import_strategy(strategy),
+        grid,
+        train=train,
+        test=test,
+        score=score,
+        processes=processes,
+        cash=cash,
+        commission=commission,
+        leverage=leverage,
+        indicator_cache=not no_indicator_cache,
+        low_memory=low_memory,
+    )
+    click.echo(result.windows.to_string())
+    click.echo(f"组合价值: {result.value}")
+    click.echo(f"最大回撤: {result.max_drawdown}")
+    click.echo(f"夏普比率: {result.sharpe}")
+
+
+if __name__ == "__main__":
+    from commands.walkforward import main
+
+    main()